@@ -0,0 +1,109 @@
+"""
+Compare payload bytes and serialization time of the work order list response on a synthetic list
+of 10k work orders: stdlib json vs the shared api_response encoder, uncompressed vs gzip vs brotli.
+
+    pip install msgspec brotli
+    python benchmarks/api_response_benchmark.py [--count 10000] [--with-reports]
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cdk", "shared_layer", "python"))
+
+import api_response  # noqa: E402
+
+STATUSES = ["Approved", "In Progress", "Pending", "Cancelled"]
+LOCATIONS = [
+    ("Dandenong Substation", "-37.976034", "145.215764"),
+    ("Clayton Terminal Station", "-37.915843", "145.121741"),
+    ("Springvale Zone Substation", "-37.948120", "145.152861"),
+    ("Oakleigh Distribution Centre", "-37.899882", "145.088214"),
+]
+REPORT = "<h2>Safety check</h2>" + "<p>Hazard reviewed, control measures in place.</p>" * 300
+
+
+def synthetic_work_orders(count, with_reports):
+    rng = random.Random(42)
+    work_orders = []
+    for index in range(count):
+        location_name, latitude, longitude = rng.choice(LOCATIONS)
+        work_order = {
+            "work_order_id": f"WO{index:06d}",
+            "description": f"Scheduled maintenance task {index}",
+            "location_name": location_name,
+            "asset_id": f"AST-{rng.randint(1, 500):04d}",
+            "status": rng.choice(STATUSES),
+            "scheduled_start_timestamp": "2025-01-22T08:00:00",
+            "scheduled_finish_timestamp": "2025-01-22T12:00:00",
+            "owner_name": f"Technician {rng.randint(1, 200)}",
+            "priority": Decimal(rng.randint(1, 5)),
+            "location_details": {
+                "location_name": location_name,
+                "latitude": Decimal(latitude),
+                "longitude": Decimal(longitude),
+                "address": "1234 South Gippsland Highway, Dandenong VIC 3175",
+            },
+        }
+        if with_reports:
+            work_order["safetycheckresponse"] = REPORT
+        work_orders.append(work_order)
+    return work_orders
+
+
+def stdlib_dumps(body):
+    return json.dumps(body, default=api_response._default).encode("utf-8")
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--with-reports", action="store_true", help="include a safety report body on every row")
+    args = parser.parse_args()
+
+    work_orders = synthetic_work_orders(args.count, args.with_reports)
+    print(f"{args.count} work orders, reports {'included' if args.with_reports else 'omitted'}")
+    print(f"msgspec: {'yes' if api_response.msgspec else 'no (stdlib fallback)'}, "
+          f"brotli: {'yes' if api_response.brotli else 'no'}")
+    print()
+
+    rows = []
+    baseline, baseline_ms = timed(lambda: stdlib_dumps(work_orders), args.repeat)
+    rows.append(("json.dumps", len(baseline), baseline_ms))
+    payload, encode_ms = timed(lambda: api_response.dumps(work_orders), args.repeat)
+    rows.append(("api_response.dumps", len(payload), encode_ms))
+
+    gzipped, gzip_ms = timed(lambda: gzip.compress(payload, compresslevel=api_response.GZIP_LEVEL), args.repeat)
+    rows.append(("+ gzip", len(gzipped), encode_ms + gzip_ms))
+    if api_response.brotli:
+        brotlied, brotli_ms = timed(lambda: api_response.compress(payload, "br"), args.repeat)
+        rows.append(("+ brotli", len(brotlied), encode_ms + brotli_ms))
+
+    event = {"headers": {"Accept-Encoding": "gzip, deflate, br"}}
+    response, response_ms = timed(lambda: api_response.build_response(200, work_orders, event), args.repeat)
+    rows.append((f"build_response ({response['headers'].get('Content-Encoding', 'identity')}, base64)",
+                 len(response["body"]), response_ms))
+
+    print(f"{'variant':<34}{'bytes':>12}{'vs json':>10}{'ms':>10}")
+    for name, size, elapsed in rows:
+        print(f"{name:<34}{size:>12,}{size / len(baseline):>9.1%}{elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
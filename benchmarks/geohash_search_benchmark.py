@@ -0,0 +1,108 @@
+"""
+Compare the geohash-covered radius search used by the work order list API against brute-force
+distance filtering, on a synthetic set of 100k locations spread over Victoria. The GeohashIndex
+GSI is modelled in memory: a dict of geohash_prefix partitions holding sorted full geohashes, so
+a cell lookup is a partition read narrowed by begins_with, as in DynamoDB.
+
+    python benchmarks/geohash_search_benchmark.py [--count 100000] [--queries 200]
+"""
+import argparse
+import bisect
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cdk", "shared_layer", "python"))
+
+import geohash  # noqa: E402
+
+# Roughly the state of Victoria
+MIN_LATITUDE, MAX_LATITUDE = -39.0, -34.0
+MIN_LONGITUDE, MAX_LONGITUDE = 141.0, 150.0
+RADII_KM = [2, 10, 25]
+MAX_SEARCH_CELLS = 32
+
+
+def synthetic_locations(count):
+    rng = random.Random(42)
+    return [
+        (f"Location {index}", rng.uniform(MIN_LATITUDE, MAX_LATITUDE), rng.uniform(MIN_LONGITUDE, MAX_LONGITUDE))
+        for index in range(count)
+    ]
+
+
+def build_index(locations):
+    partitions = defaultdict(list)
+    for name, latitude, longitude in locations:
+        code = geohash.encode(latitude, longitude)
+        partitions[code[:geohash.INDEX_PRECISION]].append((code, name, latitude, longitude))
+    for partition in partitions.values():
+        partition.sort()
+    return partitions
+
+
+def query_cell(partitions, cell):
+    partition = partitions.get(cell[:geohash.INDEX_PRECISION], [])
+    start = bisect.bisect_left(partition, (cell,))
+    end = bisect.bisect_left(partition, (cell + "~",))
+    return partition[start:end]
+
+
+def geohash_search(partitions, latitude, longitude, radius_km):
+    bbox = geohash.radius_bbox(latitude, longitude, radius_km)
+    cells = geohash.cover(*bbox, max_cells=MAX_SEARCH_CELLS)
+    candidates = [row for cell in cells for row in query_cell(partitions, cell)]
+    found = {
+        name
+        for _, name, lat, lon in candidates
+        if geohash.haversine_km(latitude, longitude, lat, lon) <= radius_km
+    }
+    return found, len(candidates), len(cells)
+
+
+def brute_force_search(locations, latitude, longitude, radius_km):
+    return {
+        name
+        for name, lat, lon in locations
+        if geohash.haversine_km(latitude, longitude, lat, lon) <= radius_km
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    locations = synthetic_locations(args.count)
+    started = time.perf_counter()
+    partitions = build_index(locations)
+    print(f"{args.count} locations, index built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    rng = random.Random(7)
+    points = [(rng.uniform(MIN_LATITUDE + 0.5, MAX_LATITUDE - 0.5), rng.uniform(MIN_LONGITUDE + 0.5, MAX_LONGITUDE - 0.5))
+              for _ in range(args.queries)]
+
+    print(f"{'radius':>8} {'brute ms/q':>11} {'geohash ms/q':>13} {'speedup':>8} {'cells/q':>8} {'read/q':>8} {'hits/q':>7}")
+    for radius_km in RADII_KM:
+        started = time.perf_counter()
+        expected = [brute_force_search(locations, lat, lon, radius_km) for lat, lon in points]
+        brute_ms = (time.perf_counter() - started) * 1000 / len(points)
+
+        started = time.perf_counter()
+        results = [geohash_search(partitions, lat, lon, radius_km) for lat, lon in points]
+        geohash_ms = (time.perf_counter() - started) * 1000 / len(points)
+
+        for (found, _, _), wanted in zip(results, expected):
+            assert found == wanted, "geohash search disagrees with brute force"
+        candidates = sum(result[1] for result in results) / len(results)
+        cells = sum(result[2] for result in results) / len(results)
+        hits = sum(len(found) for found in expected) / len(expected)
+        print(f"{radius_km:>6} km {brute_ms:>11.2f} {geohash_ms:>13.3f} {brute_ms / geohash_ms:>7.0f}x "
+              f"{cells:>8.1f} {candidates:>8.0f} {hits:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -85,6 +85,10 @@ class FieldWorkforceSafetyParentStack(Stack):
                 agent_alias_id=bedrock_agents_stack.supervisor_agent_alias_id,
                 work_order_table_name=bedrock_agents_stack.work_orders_table_name,
                 location_table_name=bedrock_agents_stack.locations_table_name,
+                locations_version_parameter_name=bedrock_agents_stack.locations_version_parameter_name,
+                work_order_table_stream_arn=bedrock_agents_stack.work_orders_table_stream_arn,
+                location_table_stream_arn=bedrock_agents_stack.locations_table_stream_arn,
+                shared_layer=bedrock_agents_stack.shared_layer,
             )
             # Add dependency to ensure Bedrock Agents stack is created first
             backend_stack.add_dependency(bedrock_agents_stack)
@@ -8,6 +8,7 @@ from aws_cdk import (
     CfnOutput,
     aws_dynamodb as dynamodb,
     aws_iam as iam,
+    aws_lambda as lambda_,
     RemovalPolicy,
 )
 from constructs import Construct
@@ -17,8 +18,12 @@ from .safetycheckrequestflow import SafetyCheckRequestStack
 from .workorderlistflow import WorkOrderApiStack
 from .safetycheckprocessorflow import SafetyCheckProcessorStack
 from .vicemergencyflow import VicEmergencyStack
+from .workorderviewflow import WorkOrderViewStack
+from .safetycheckarchiveflow import SafetyCheckArchiveStack
 
 EMBEDDINGS_SIZE = 512
+# Item collections the work order view is spread over, so its writes don't share one partition
+WORK_ORDER_VIEW_SHARDS = 16
 
 
 class BackendStack(NestedStack):
@@ -31,6 +36,10 @@ class BackendStack(NestedStack):
         agent_alias_id: str,
         work_order_table_name:  str,
         location_table_name: str,
+        locations_version_parameter_name: str,
+        work_order_table_stream_arn: str,
+        location_table_stream_arn: str,
+        shared_layer: lambda_.ILayerVersion,
         language_code: str = "en",
         **kwargs
     ) -> None:
@@ -42,6 +51,9 @@ class BackendStack(NestedStack):
             region=self.region,
         )
 
+        # Shared helper modules (API responses, location cache), built once by the agents stack
+        self.shared_layer = shared_layer
+
         self.apigw = coreconstructs.CoreApiGateway(
             self,
             "ApiGateway",
@@ -49,7 +61,8 @@ class BackendStack(NestedStack):
             user_pool=self.cognito.user_pool,
         )
 
-        # Create DynamoDB table to store workorder safety requests with stream enabled
+        # Create DynamoDB table to store workorder safety requests with stream enabled; old images
+        # let the archive flow read requests removed by TTL
         self.work_order_requests_table = dynamodb.Table(
             self,
             "WorkOrderSafetyRequestsTable",
@@ -57,17 +70,56 @@ class BackendStack(NestedStack):
                 name="requestId",
                 type=dynamodb.AttributeType.STRING
             ),
-            stream=dynamodb.StreamViewType.NEW_IMAGE,
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
             time_to_live_attribute="ttl",
             removal_policy= RemovalPolicy.DESTROY
         )
 
+        # Expired safety check requests archived to S3
+        self.safetycheckarchiveflow = SafetyCheckArchiveStack(
+            self,
+            "SafetyCheckArchiveStack",
+            work_order_requests_table=self.work_order_requests_table,
+        )
+
         # Safety check request flow
         self.safetycheckrequestflow = SafetyCheckRequestStack(
             self,
             "SafetyCheckRequestStack",
             api_gateway=self.apigw,
             work_order_requests_table=self.work_order_requests_table,
+            shared_layer=self.shared_layer,
+            dynamo_db_workorder_table=work_order_table_name,
+            dynamo_db_location_table=location_table_name,
+        )
+
+        # Denormalized work order view (work order + location + latest safety check), kept in sync
+        # from the work orders and locations table streams
+        self.work_order_view_table = dynamodb.Table(
+            self,
+            "WorkOrderViewTable",
+            partition_key=dynamodb.Attribute(
+                name="collection",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="work_order_id",
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy= RemovalPolicy.DESTROY
+        )
+
+        self.workorder_view_flow = WorkOrderViewStack(
+            self,
+            "WorkOrderViewStack",
+            work_order_view_table=self.work_order_view_table,
+            dynamo_db_workorder_table=work_order_table_name,
+            dynamo_db_location_table=location_table_name,
+            work_order_table_stream_arn=work_order_table_stream_arn,
+            location_table_stream_arn=location_table_stream_arn,
+            view_shards=WORK_ORDER_VIEW_SHARDS,
+            shared_layer=self.shared_layer,
         )
 
         # APIGW for workorder list
@@ -84,7 +136,12 @@ class BackendStack(NestedStack):
             "WorkOrdersAPI",
             api_gateway=self.apigw_workorder,
             dynamo_db_workorder_table=work_order_table_name,
-            dynamo_db_location_table=location_table_name
+            dynamo_db_location_table=location_table_name,
+            locations_version_parameter_name=locations_version_parameter_name,
+            work_order_view_table=self.work_order_view_table,
+            shared_layer=self.shared_layer,
+            view_shards=WORK_ORDER_VIEW_SHARDS,
+            export_invoker_role=self.cognito.auth_user_role,
         )
 
         # SafetyCheck workflow
@@ -103,11 +160,13 @@ class BackendStack(NestedStack):
             "VicEmergencyStack",
             api_gateway=self.apigw,
             dynamo_db_workorder_table=work_order_table_name,
+            shared_layer=self.shared_layer,
         )
 
         # Store outputs as properties for easy access by the frontend stack
         self.api_endpoint = self.apigw.rest_api.url
         self.workorder_api_endpoint = self.apigw_workorder.rest_api.url
+        self.workorder_export_url = self.workorder_workflow.export_url
         self.region_name = self.region
         self.user_pool_id = self.cognito.user_pool.user_pool_id
         self.user_pool_client_id = self.cognito.user_pool_client.user_pool_client_id
@@ -135,6 +194,13 @@ class BackendStack(NestedStack):
             export_name=f"{Stack.of(self).stack_name}WorkOrderApiEndpoint",
         )
         
+        CfnOutput(
+            self,
+            "WorkOrderExportUrl",
+            value=self.workorder_export_url,
+            export_name=f"{Stack.of(self).stack_name}WorkOrderExportUrl",
+        )
+        
         CfnOutput(
             self,
             "CognitoUserPoolId",
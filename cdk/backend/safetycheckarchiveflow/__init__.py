@@ -0,0 +1,170 @@
+import os
+
+from aws_cdk import (
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_lambda_python_alpha as lambda_python,
+    aws_s3 as s3,
+    Duration,
+    RemovalPolicy,
+    aws_dynamodb as dynamodb,
+    aws_logs as logs
+)
+from constructs import Construct
+from cdk_nag import NagSuppressions, NagPackSuppression
+
+
+class SafetyCheckArchiveStack(Construct):
+    """
+    Cold archive of the safety check requests table: requests removed by the table's TTL are
+    written to S3 as gzipped JSON Lines, partitioned by creation date.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        work_order_requests_table: dynamodb.Table,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.archive_bucket = s3.Bucket(
+            self,
+            "SafetyCheckArchiveBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            lifecycle_rules=[
+                s3.LifecycleRule(
+                    enabled=True,
+                    transitions=[
+                        s3.Transition(
+                            storage_class=s3.StorageClass.INFREQUENT_ACCESS,
+                            transition_after=Duration.days(30),
+                        ),
+                    ],
+                ),
+            ],
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            self.archive_bucket,
+            [
+                NagPackSuppression(
+                    id="AwsSolutions-S1",
+                    reason="Server access logs are not required for this demo archive bucket, it is only written by the archive function"
+                )
+            ]
+        )
+
+        # Define function name first
+        function_name = f"{construct_id.lower()}-request-archiver"
+
+        # Create explicit log group for the archive function
+        archiver_log_group = logs.LogGroup(
+            self,
+            "SafetyCheckArchiverLogGroup",
+            log_group_name=f"/aws/lambda/{function_name}",
+            retention=logs.RetentionDays.ONE_WEEK,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # a lambda function archiving expired safety check requests
+        archiver_fn = lambda_python.PythonFunction(
+            self,
+            "SafetyCheckArchiver",
+            function_name=function_name,
+            entry=f"{os.path.dirname(os.path.realpath(__file__))}/archiver",
+            index="index.py",
+            handler="lambda_handler",
+            runtime=lambda_.Runtime.PYTHON_3_13,
+            timeout=Duration.seconds(60),
+            memory_size=256,
+            environment={
+                "LOG_LEVEL": "INFO",
+                "POWERTOOLS_SERVICE_NAME": "SafetyCheckArchiveFlow",
+                "ARCHIVE_BUCKET_NAME": self.archive_bucket.bucket_name,
+                "ARCHIVE_PREFIX": "safety-check-requests",
+            },
+        )
+
+        self.archive_bucket.grant_put(archiver_fn)
+        work_order_requests_table.grant_stream_read(archiver_fn)
+
+        archiver_fn_policy = iam.Policy(self, "SafetyCheckArchiverFnPolicy")
+
+        archiver_fn_policy.add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "logs:CreateLogGroup",
+                    "logs:CreateLogStream",
+                    "logs:PutLogEvents",
+                ],
+                resources=["*"],
+            ),
+        )
+
+        # Attach the IAM policy to the Lambda function's role
+        archiver_fn.role.attach_inline_policy(archiver_fn_policy)
+
+        # Only TTL deletions of request items: those are made by the DynamoDB service principal,
+        # and cache entries and leases carry no status
+        lambda_.EventSourceMapping(
+            self,
+            "RequestArchiveMapping",
+            target=archiver_fn,
+            event_source_arn=work_order_requests_table.table_stream_arn,
+            starting_position=lambda_.StartingPosition.TRIM_HORIZON,
+            batch_size=100,
+            max_batching_window=Duration.seconds(60),
+            bisect_batch_on_error=True,
+            retry_attempts=3,
+            filters=[
+                lambda_.FilterCriteria.filter({
+                    "eventName": lambda_.FilterRule.is_equal("REMOVE"),
+                    "userIdentity": {
+                        "type": lambda_.FilterRule.is_equal("Service"),
+                        "principalId": lambda_.FilterRule.is_equal("dynamodb.amazonaws.com"),
+                    },
+                    "dynamodb": {"OldImage": {"status": {"S": lambda_.FilterRule.exists()}}},
+                })
+            ],
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            archiver_fn_policy,
+            [
+                NagPackSuppression(
+                    id="AwsSolutions-IAM5",
+                    reason="This Lambda has wildcard permissions to manage CloudWatch Logs log groups.",
+                )
+            ],
+            True,
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            archiver_fn,
+            [
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": """Certain policies will implement wildcard permissions to expedite development. 
+            TODO: Replace on Production environment (Path to Production)""",
+                },
+                {
+                    "id": "AwsSolutions-IAM4",
+                    "reason": """Prototype will use managed policies to expedite development. 
+                        TODO: Replace on Production environment (Path to Production)""",
+                    "appliesTo": [
+                        "Policy::arn:<AWS::Partition>:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-L1",
+                    "reason": """Policy managed by AWS can not specify a different runtime version""",
+                },
+            ],
+            True,
+        )
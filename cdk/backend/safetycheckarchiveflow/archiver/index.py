@@ -0,0 +1,70 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+logger = Logger()
+
+ARCHIVE_BUCKET_NAME = os.getenv("ARCHIVE_BUCKET_NAME")
+ARCHIVE_PREFIX = os.getenv("ARCHIVE_PREFIX", "safety-check-requests")
+
+s3_client = boto3.client('s3')
+deserializer = TypeDeserializer()
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def deserialize(image):
+    return {name: deserializer.deserialize(value) for name, value in image.items()}
+
+
+def partition_date(item, record):
+    """
+    Archive partition of a request: the day it was created, falling back to the day it expired.
+    """
+    created_at = item.get('createdAt')
+    if created_at:
+        return created_at[:10]
+    expired_at = record['dynamodb'].get('ApproximateCreationDateTime', 0)
+    return datetime.fromtimestamp(float(expired_at), tz=timezone.utc).date().isoformat()
+
+
+def archive_key(day, first_sequence_number):
+    year, month, date = day.split("-")
+    return f"{ARCHIVE_PREFIX}/year={year}/month={month}/day={date}/{first_sequence_number}.jsonl.gz"
+
+
+@logger.inject_lambda_context
+def lambda_handler(event, _context: LambdaContext):
+    """
+    DynamoDB Streams consumer archiving safety check requests removed by the requests table's TTL.
+    Each batch becomes one gzipped JSON Lines object per creation day. Objects are named after the
+    first stream sequence number they hold, so a retried batch overwrites rather than duplicates.
+    """
+    partitions = defaultdict(list)
+    for record in event['Records']:
+        item = deserialize(record['dynamodb']['OldImage'])
+        partitions[partition_date(item, record)].append((record['dynamodb']['SequenceNumber'], item))
+
+    for day, entries in partitions.items():
+        body = "".join(json.dumps(item, default=_default, separators=(",", ":")) + "\n" for _, item in entries)
+        key = archive_key(day, entries[0][0])
+        s3_client.put_object(
+            Bucket=ARCHIVE_BUCKET_NAME,
+            Key=key,
+            Body=gzip.compress(body.encode("utf-8")),
+            ContentType="application/x-ndjson",
+            ContentEncoding="gzip",
+        )
+        logger.info(f"Archived {len(entries)} expired safety check requests to s3://{ARCHIVE_BUCKET_NAME}/{key}")
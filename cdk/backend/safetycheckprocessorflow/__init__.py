@@ -4,18 +4,39 @@ from aws_cdk import (
     Stack,
     aws_iam as iam,
     aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_event_sources,
     aws_lambda_python_alpha as lambda_python,
     CfnOutput,
     Names,
     Duration,
     RemovalPolicy,
     aws_dynamodb as dynamodb,
-    aws_logs as logs
+    aws_logs as logs,
+    aws_sqs as sqs,
+    aws_cloudwatch as cloudwatch,
 )
 from constructs import Construct
 from cdk_nag import NagSuppressions, NagPackSuppression
 import core_constructs as core
 
+# Concurrent processor invocations per priority lane; the high lane keeps capacity when the normal one backs up
+HIGH_PRIORITY_LANE_CONCURRENCY = 5
+NORMAL_PRIORITY_LANE_CONCURRENCY = 2
+# Requests per processor invocation, run concurrently by its worker pool
+PROCESSOR_BATCH_SIZE = 5
+# InvokeAgent admission rate and burst shared by all processors; keep below the account quota
+AGENT_RATE_PER_MINUTE = 60
+AGENT_BURST = 10
+PROCESSOR_TIMEOUT_SECONDS = 180
+# Lane queue redelivery: six times the processor timeout, as recommended for Lambda SQS sources
+LANE_VISIBILITY_TIMEOUT_SECONDS = 6 * PROCESSOR_TIMEOUT_SECONDS
+LANE_MAX_RECEIVE_COUNT = 3
+# Longest delay a request over the agent rate limit is requeued with (SQS maximum)
+MAX_REQUEUE_DELAY_SECONDS = 900
+# A work order's in-flight lease must outlive every delivery of its request, so a retry never runs
+# alongside a new check; it is renewed on each requeue and released on completion or final failure
+SAFETY_CHECK_LEASE_SECONDS = LANE_MAX_RECEIVE_COUNT * LANE_VISIBILITY_TIMEOUT_SECONDS + MAX_REQUEUE_DELAY_SECONDS
+
 
 class SafetyCheckProcessorStack(Construct):
 
@@ -51,7 +72,7 @@ class SafetyCheckProcessorStack(Construct):
             index="index.py",
             handler="lambda_handler",
             runtime=lambda_.Runtime.PYTHON_3_13,
-            timeout=Duration.seconds(180),
+            timeout=Duration.seconds(PROCESSOR_TIMEOUT_SECONDS),
             memory_size=512,
             environment={
                 "LOG_LEVEL": "DEBUG",
@@ -59,7 +80,17 @@ class SafetyCheckProcessorStack(Construct):
                 "AGENT_ID": str(agent_id),
                 "AGENT_ALIAS_ID": str(agent_alias_id),
                 "WORK_ORDER_TABLE_NAME": str(dynamo_db_workorder_table),
-                "WORK_ORDER_REQUEST_TABLE_NAME": work_order_requests_table.table_name
+                "WORK_ORDER_REQUEST_TABLE_NAME": work_order_requests_table.table_name,
+                "SAFETY_REPORT_CACHE_SECONDS": "3600",
+                "COMPLETED_REQUEST_TTL_SECONDS": "604800",
+                "MAX_AGENT_WORKERS": str(PROCESSOR_BATCH_SIZE),
+                "PROGRESS_CHUNKS": "5",
+                "PROGRESS_INTERVAL_MS": "2000",
+                "AGENT_RATE_PER_MINUTE": str(AGENT_RATE_PER_MINUTE),
+                "AGENT_BURST": str(AGENT_BURST),
+                "RUNNING_CLAIM_SECONDS": str(PROCESSOR_TIMEOUT_SECONDS),
+                "SAFETY_CHECK_LEASE_SECONDS": str(SAFETY_CHECK_LEASE_SECONDS),
+                "MAX_REQUEUE_DELAY_SECONDS": str(MAX_REQUEUE_DELAY_SECONDS),
             },
         )
         
@@ -67,16 +98,291 @@ class SafetyCheckProcessorStack(Construct):
         safety_check_fn_policy = iam.Policy(self, "SafetyCheckProcessorFnPolicy")
 
         work_order_requests_table.grant_read_write_data(safety_check_fn_policy)
-        work_order_requests_table.grant_stream_read(safety_check_processor_fn)
-        # Create event source mapping for DynamoDB Streams
+
+        # Priority lanes: new requests are routed to one of two queues, each drained by the
+        # processor with its own concurrency limit
+        lane_queues = {}
+        dead_letter_queues = []
+        for lane, max_concurrency in (
+            ("HighPriority", HIGH_PRIORITY_LANE_CONCURRENCY),
+            ("NormalPriority", NORMAL_PRIORITY_LANE_CONCURRENCY),
+        ):
+            dead_letter_queue = sqs.Queue(
+                self,
+                f"{lane}DeadLetterQueue",
+                retention_period=Duration.days(14),
+                enforce_ssl=True,
+            )
+            NagSuppressions.add_resource_suppressions(
+                dead_letter_queue,
+                [
+                    NagPackSuppression(
+                        id="AwsSolutions-SQS3",
+                        reason="This queue is the dead-letter queue of a safety check lane.",
+                    )
+                ],
+            )
+            lane_queue = sqs.Queue(
+                self,
+                f"{lane}Queue",
+                visibility_timeout=Duration.seconds(LANE_VISIBILITY_TIMEOUT_SECONDS),
+                enforce_ssl=True,
+                dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=LANE_MAX_RECEIVE_COUNT, queue=dead_letter_queue),
+            )
+            lane_queue.grant_consume_messages(safety_check_processor_fn)
+            # Requests over the agent rate limit are sent back to their lane with a delay
+            lane_queue.grant_send_messages(safety_check_processor_fn)
+            lane_mapping = lambda_.EventSourceMapping(
+                self,
+                f"{lane}LaneMapping",
+                target=safety_check_processor_fn,
+                event_source_arn=lane_queue.queue_arn,
+                batch_size=PROCESSOR_BATCH_SIZE,
+                max_batching_window=Duration.seconds(1),
+                max_concurrency=max_concurrency,
+                # Only failed requests are retried, not the whole batch
+                report_batch_item_failures=True,
+            )
+            lane_mapping.node.add_dependency(lane_queue)
+            cloudwatch.Alarm(
+                self,
+                f"{lane}DeadLetterAlarm",
+                alarm_description=f"Safety checks in the {lane} lane ran out of receives and were failed.",
+                # The dead-letter function drains the queue, so alarm on what it receives
+                metric=dead_letter_queue.metric_number_of_messages_received(period=Duration.minutes(5)),
+                threshold=0,
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                evaluation_periods=1,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            )
+            lane_queues[lane] = lane_queue
+            dead_letter_queues.append(dead_letter_queue)
+
+        # Define function name first
+        dead_letter_function_name = f"{construct_id.lower()}-fail-query"
+
+        # Create explicit log group for the dead-letter function
+        safety_check_dead_letter_log_group = logs.LogGroup(
+            self,
+            "SafetyCheckDeadLetterLogGroup",
+            log_group_name=f"/aws/lambda/{dead_letter_function_name}",
+            retention=logs.RetentionDays.ONE_WEEK,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # a lambda function failing the requests whose messages ran out of receives, or that the
+        # router could not queue, so clients stop polling and the work order's lease is freed
+        safety_check_dead_letter_fn = lambda_python.PythonFunction(
+            self,
+            "FailQuery",
+            function_name=dead_letter_function_name,
+            entry=f"{os.path.dirname(os.path.realpath(__file__))}/safety_check_fn",
+            index="index.py",
+            handler="dead_letter_handler",
+            runtime=lambda_.Runtime.PYTHON_3_13,
+            timeout=Duration.seconds(30),
+            memory_size=256,
+            environment={
+                "LOG_LEVEL": "INFO",
+                "POWERTOOLS_SERVICE_NAME": "SafetyCheckFlow",
+                "WORK_ORDER_REQUEST_TABLE_NAME": work_order_requests_table.table_name,
+                "COMPLETED_REQUEST_TTL_SECONDS": "604800",
+            },
+        )
+        work_order_requests_table.grant_read_write_data(safety_check_dead_letter_fn)
+        for lane, dead_letter_queue in zip(lane_queues, dead_letter_queues):
+            dead_letter_queue.grant_consume_messages(safety_check_dead_letter_fn)
+            lambda_.EventSourceMapping(
+                self,
+                f"{lane}DeadLetterMapping",
+                target=safety_check_dead_letter_fn,
+                event_source_arn=dead_letter_queue.queue_arn,
+                batch_size=10,
+                report_batch_item_failures=True,
+            )
+
+        NagSuppressions.add_resource_suppressions(
+            safety_check_dead_letter_fn,
+            [
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": """Certain policies will implement wildcard permissions to expedite development. 
+            TODO: Replace on Production environment (Path to Production)""",
+                },
+                {
+                    "id": "AwsSolutions-IAM4",
+                    "reason": """Prototype will use managed policies to expedite development. 
+                        TODO: Replace on Production environment (Path to Production)""",
+                    "appliesTo": [
+                        "Policy::arn:<AWS::Partition>:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-L1",
+                    "reason": """Policy managed by AWS can not specify a different runtime version""",
+                },
+            ],
+            True,
+        )
+
+        # Define function name first
+        router_function_name = f"{construct_id.lower()}-route-query"
+
+        # Create explicit log group for safety check router function
+        safety_check_router_log_group = logs.LogGroup(
+            self,
+            "SafetyCheckRouterLogGroup",
+            log_group_name=f"/aws/lambda/{router_function_name}",
+            retention=logs.RetentionDays.ONE_WEEK,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # a lambda function routing new requests to the priority lanes
+        safety_check_router_fn = lambda_python.PythonFunction(
+            self,
+            "RouteQuery",
+            function_name=router_function_name,
+            entry=f"{os.path.dirname(os.path.realpath(__file__))}/safety_check_router",
+            index="index.py",
+            handler="lambda_handler",
+            runtime=lambda_.Runtime.PYTHON_3_13,
+            timeout=Duration.seconds(30),
+            memory_size=256,
+            environment={
+                "LOG_LEVEL": "INFO",
+                "POWERTOOLS_SERVICE_NAME": "SafetyCheckFlow",
+                "HIGH_PRIORITY_QUEUE_URL": lane_queues["HighPriority"].queue_url,
+                "NORMAL_PRIORITY_QUEUE_URL": lane_queues["NormalPriority"].queue_url,
+                "HIGH_PRIORITY_MAX": "2",
+            },
+        )
+
+        for lane_queue in lane_queues.values():
+            lane_queue.grant_send_messages(safety_check_router_fn)
+        work_order_requests_table.grant_stream_read(safety_check_router_fn)
+
+        # Stream batches the router still fails after its retries land here; the dead-letter function
+        # reads their records back from the stream and fails the requests that were never queued
+        router_failure_queue = sqs.Queue(
+            self,
+            "RouterFailureQueue",
+            retention_period=Duration.days(14),
+            enforce_ssl=True,
+        )
+        NagSuppressions.add_resource_suppressions(
+            router_failure_queue,
+            [
+                NagPackSuppression(
+                    id="AwsSolutions-SQS3",
+                    reason="This queue is the on-failure destination of the safety check router stream mapping.",
+                )
+            ],
+        )
+        cloudwatch.Alarm(
+            self,
+            "RouterFailureAlarm",
+            alarm_description="The safety check router dropped stream records; their requests were failed.",
+            metric=router_failure_queue.metric_number_of_messages_received(period=Duration.minutes(5)),
+            threshold=0,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            evaluation_periods=1,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+        router_failure_queue.grant_consume_messages(safety_check_dead_letter_fn)
+        work_order_requests_table.grant_stream_read(safety_check_dead_letter_fn)
         lambda_.EventSourceMapping(
+            self,
+            "RouterFailureMapping",
+            target=safety_check_dead_letter_fn,
+            event_source_arn=router_failure_queue.queue_arn,
+            batch_size=10,
+            report_batch_item_failures=True,
+        )
+
+        # Create event source mapping for DynamoDB Streams
+        stream_mapping = lambda_.EventSourceMapping(
             self,
             "StreamProcessorMapping",
-            target=safety_check_processor_fn,
+            target=safety_check_router_fn,
             event_source_arn=work_order_requests_table.table_stream_arn,
             starting_position=lambda_.StartingPosition.TRIM_HORIZON,
-            batch_size=1,
-            retry_attempts=3
+            batch_size=10,
+            bisect_batch_on_error=True,
+            retry_attempts=3,
+            on_failure=lambda_event_sources.SqsDlq(router_failure_queue),
+            # Only new PENDING requests need the agents; cache hits are inserted COMPLETED and
+            # cache entries carry no status
+            filters=[
+                lambda_.FilterCriteria.filter({
+                    "eventName": lambda_.FilterRule.is_equal("INSERT"),
+                    "dynamodb": {"NewImage": {"status": {"S": lambda_.FilterRule.is_equal("PENDING")}}},
+                })
+            ],
+            # Polled/filtered/invoked event counts, used for the filtered-out share below
+            metrics_config=lambda_.MetricsConfig(metrics=[lambda_.MetricType.EVENT_COUNT]),
+        )
+
+        # Share of stream records (processor MODIFY updates, cache and lease items, TTL removals,
+        # cache-hit inserts) dropped by the filter before any invocation
+        def stream_mapping_metric(metric_name):
+            return cloudwatch.Metric(
+                namespace="AWS/Lambda",
+                metric_name=metric_name,
+                dimensions_map={"EventSourceMappingUUID": stream_mapping.event_source_mapping_id},
+                statistic=cloudwatch.Stats.SUM,
+                period=Duration.minutes(5),
+            )
+
+        filtered_out_share = cloudwatch.MathExpression(
+            expression="IF(polled > 0, 100 * filtered / polled, 0)",
+            using_metrics={
+                "polled": stream_mapping_metric("PolledEventCount"),
+                "filtered": stream_mapping_metric("FilteredOutEventCount"),
+            },
+            label="Filtered-out stream records (%)",
+            period=Duration.minutes(5),
+        )
+        cloudwatch.Dashboard(
+            self,
+            "SafetyCheckStreamDashboard",
+            widgets=[
+                [
+                    cloudwatch.GraphWidget(
+                        title="Safety check stream records",
+                        left=[
+                            stream_mapping_metric("PolledEventCount"),
+                            stream_mapping_metric("FilteredOutEventCount"),
+                            stream_mapping_metric("InvokedEventCount"),
+                        ],
+                        right=[filtered_out_share],
+                        width=12,
+                    )
+                ]
+            ],
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            safety_check_router_fn,
+            [
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": """Certain policies will implement wildcard permissions to expedite development. 
+            TODO: Replace on Production environment (Path to Production)""",
+                },
+                {
+                    "id": "AwsSolutions-IAM4",
+                    "reason": """Prototype will use managed policies to expedite development. 
+                        TODO: Replace on Production environment (Path to Production)""",
+                    "appliesTo": [
+                        "Policy::arn:<AWS::Partition>:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-L1",
+                    "reason": """Policy managed by AWS can not specify a different runtime version""",
+                },
+            ],
+            True,
         )
 
         safety_check_fn_policy.add_statements(
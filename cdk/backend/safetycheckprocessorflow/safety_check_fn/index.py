@@ -4,9 +4,14 @@ import functools
 import boto3
 import traceback
 import re
+import math
+import random
 import time
-from datetime import datetime
+from decimal import Decimal
+from boto3.dynamodb.types import TypeDeserializer
+from datetime import datetime, timedelta
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from botocore.config import Config
 from aws_lambda_powertools import Logger
@@ -19,8 +24,35 @@ AGENT_ID = os.getenv("AGENT_ID")
 AGENT_ALIAS_ID = os.getenv("AGENT_ALIAS_ID")
 WORK_ORDER_REQUEST_TABLE_NAME = os.getenv("WORK_ORDER_REQUEST_TABLE_NAME")
 WORK_ORDER_TABLE_NAME = os.getenv("WORK_ORDER_TABLE_NAME")
+# Freshness window of the content-addressed report cache read by the safety check request function
+SAFETY_REPORT_CACHE_SECONDS = int(os.getenv("SAFETY_REPORT_CACHE_SECONDS", "3600"))
+CACHE_KEY_PREFIX = "cache#"
+# Completed requests expire (and get archived to S3) this long after completion
+COMPLETED_REQUEST_TTL_SECONDS = int(os.getenv("COMPLETED_REQUEST_TTL_SECONDS", str(7 * 86400)))
+# In-flight lease taken per work order by the safety check request function, renewed on requeue
+LEASE_KEY_PREFIX = "lease#"
+SAFETY_CHECK_LEASE_SECONDS = int(os.getenv("SAFETY_CHECK_LEASE_SECONDS", "4140"))
+# Records of one batch are run concurrently on at most this many threads; agent calls are I/O bound
+MAX_AGENT_WORKERS = int(os.getenv("MAX_AGENT_WORKERS", "5"))
+# The partial report is persisted every PROGRESS_CHUNKS chunks or PROGRESS_INTERVAL_MS, whichever
+# comes first, so the status endpoint can show it while the agent is still answering
+PROGRESS_CHUNKS = int(os.getenv("PROGRESS_CHUNKS", "5"))
+PROGRESS_INTERVAL_MS = int(os.getenv("PROGRESS_INTERVAL_MS", "2000"))
+# Token bucket shared by all processor instances, sized to the account's InvokeAgent quota
+AGENT_RATE_PER_MINUTE = float(os.getenv("AGENT_RATE_PER_MINUTE", "60"))
+AGENT_BURST = float(os.getenv("AGENT_BURST", "10"))
+RATE_LIMIT_KEY = "ratelimit#invoke-agent"
+# Attempts at the bucket's conditional update before treating it as contended
+RATE_LIMIT_ATTEMPTS = 5
+# A RUNNING claim outlives one processor invocation, after which a redelivery may take it over
+RUNNING_CLAIM_SECONDS = int(os.getenv("RUNNING_CLAIM_SECONDS", "180"))
+# SQS caps message delays at 15 minutes
+MAX_REQUEUE_DELAY_SECONDS = int(os.getenv("MAX_REQUEUE_DELAY_SECONDS", "900"))
 # Initialize DynamoDB 
 dynamodb = boto3.resource('dynamodb')
+sqs_client = boto3.client('sqs')
+dynamodbstreams_client = boto3.client('dynamodbstreams')
+deserializer = TypeDeserializer()
 bedrock_agent_runtime_client = boto3.client(
         'bedrock-agent-runtime',
         config=Config(
@@ -29,15 +61,383 @@ bedrock_agent_runtime_client = boto3.client(
                 mode='adaptive'
             ),
             read_timeout=120,
-            connect_timeout=5
+            connect_timeout=5,
+            # One connection per concurrently processed record
+            max_pool_connections=max(10, MAX_AGENT_WORKERS)
         )
 )
 
-def get_agent_response(response):
+class AgentCapacityExceeded(Exception):
+    """The agent invocation budget is spent; the request should be retried after `retry_after` seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Agent capacity exceeded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def acquire_agent_token(table):
+    """
+    Take one token from the shared InvokeAgent token bucket. Returns 0 when a token was taken,
+    otherwise the seconds until one is available. The bucket item is refilled lazily from its last
+    update time and written with an optimistic condition on that time, so concurrent processors
+    never spend the same token.
+    """
+    rate = AGENT_RATE_PER_MINUTE / 60
+    for _ in range(RATE_LIMIT_ATTEMPTS):
+        now_ms = int(time.time() * 1000)
+        bucket = table.get_item(Key={'requestId': RATE_LIMIT_KEY}, ConsistentRead=True).get('Item')
+        if bucket is None:
+            tokens, refilled_at = AGENT_BURST, None
+        else:
+            elapsed = max(0, now_ms - int(bucket['refilledAt'])) / 1000
+            tokens, refilled_at = min(AGENT_BURST, float(bucket['tokens']) + elapsed * rate), int(bucket['refilledAt'])
+        if tokens < 1:
+            return (1 - tokens) / rate
+        try:
+            table.put_item(
+                Item={
+                    'requestId': RATE_LIMIT_KEY,
+                    'tokens': Decimal(str(round(tokens - 1, 6))),
+                    'refilledAt': now_ms,
+                },
+                ConditionExpression='attribute_not_exists(requestId)' if refilled_at is None else 'refilledAt = :refilled_at',
+                **({} if refilled_at is None else {'ExpressionAttributeValues': {':refilled_at': refilled_at}}),
+            )
+            return 0
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            # Another processor took a token in between, re-read the bucket
+            continue
+    return 1 / rate
+
+
+def mark_queued(table, request_id, retry_after):
+    """Show the request as QUEUED with the time it is expected to start."""
+    eta = datetime.utcnow() + timedelta(seconds=retry_after)
+    table.update_item(
+        Key={'requestId': request_id},
+        UpdateExpression='SET #status = :queued, #eta = :eta, #updatedAt = :updatedAt REMOVE #claimExpiresAt',
+        ConditionExpression='#status = :running',
+        ExpressionAttributeNames={
+            '#status': 'status',
+            '#eta': 'eta',
+            '#updatedAt': 'updatedAt',
+            '#claimExpiresAt': 'claimExpiresAt'
+        },
+        ExpressionAttributeValues={
+            ':queued': 'QUEUED',
+            ':running': 'RUNNING',
+            ':eta': eta.isoformat(),
+            ':updatedAt': datetime.utcnow().isoformat()
+        }
+    )
+
+
+def claim_request(table, request_id):
+    """
+    Claim the request for this run by moving it from PENDING or QUEUED to RUNNING. A claim whose
+    run died without finishing expires after RUNNING_CLAIM_SECONDS and can be taken over by the
+    redelivered message. Returns the claim's expiry, which identifies this run's claim, or None when
+    the request is already running elsewhere or done, i.e. the message is a duplicate and must not
+    invoke the agents.
+    """
+    now = int(time.time())
+    claim_expires_at = now + RUNNING_CLAIM_SECONDS
+    try:
+        table.update_item(
+            Key={'requestId': request_id},
+            UpdateExpression='SET #status = :running, #claimExpiresAt = :claimExpiresAt, #updatedAt = :updatedAt REMOVE #eta',
+            ConditionExpression='#status IN (:pending, :queued) OR (#status = :running AND #claimExpiresAt < :now)',
+            ExpressionAttributeNames={
+                '#status': 'status',
+                '#claimExpiresAt': 'claimExpiresAt',
+                '#eta': 'eta',
+                '#updatedAt': 'updatedAt'
+            },
+            ExpressionAttributeValues={
+                ':running': 'RUNNING',
+                ':pending': 'PENDING',
+                ':queued': 'QUEUED',
+                ':now': now,
+                ':claimExpiresAt': claim_expires_at,
+                ':updatedAt': datetime.utcnow().isoformat()
+            }
+        )
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"Safety check {request_id} is already running or done, skipping duplicate message")
+        return None
+    return claim_expires_at
+
+
+def is_finished(table, request_id):
+    """Tell whether the request already reached COMPLETED or FAILED."""
+    request = table.get_item(Key={'requestId': request_id}, ConsistentRead=True).get('Item')
+    return request is not None and request.get('status') in ('COMPLETED', 'FAILED')
+
+
+def release_claim(table, request_id):
+    """Return a request whose run failed to PENDING so the message's redelivery can claim it."""
+    try:
+        table.update_item(
+            Key={'requestId': request_id},
+            UpdateExpression='SET #status = :pending, #updatedAt = :updatedAt REMOVE #claimExpiresAt',
+            ConditionExpression='#status = :running',
+            ExpressionAttributeNames={
+                '#status': 'status',
+                '#claimExpiresAt': 'claimExpiresAt',
+                '#updatedAt': 'updatedAt'
+            },
+            ExpressionAttributeValues={
+                ':pending': 'PENDING',
+                ':running': 'RUNNING',
+                ':updatedAt': datetime.utcnow().isoformat()
+            }
+        )
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"Safety check {request_id} was no longer running")
+
+
+def requeue(record, message, retry_after):
+    """Send the request back to its lane queue, delayed until capacity is expected."""
+    # arn:aws:sqs:<region>:<account>:<queue name>
+    _, _, _, region, account, queue_name = record['eventSourceARN'].split(':')
+    # Jitter spreads the requeued requests so they don't all return at once
+    delay = min(MAX_REQUEUE_DELAY_SECONDS, math.ceil(retry_after) + random.randint(0, 5))
+    sqs_client.send_message(
+        QueueUrl=f"https://sqs.{region}.amazonaws.com/{account}/{queue_name}",
+        MessageBody=json.dumps(message),
+        DelaySeconds=delay,
+    )
+    return delay
+
+
+def cache_safety_report(table, payload_hash, request_id, safetycheckresponse):
+    """
+    Store the completed report under its request's content hash so identical requests within the
+    freshness window are answered without invoking the agents.
+    """
+    cached_at = datetime.utcnow()
+    table.put_item(
+        Item={
+            'requestId': f"{CACHE_KEY_PREFIX}{payload_hash}",
+            'sourceRequestId': request_id,
+            'safetycheckresponse': safetycheckresponse,
+            'cachedAt': cached_at.isoformat(),
+            'ttl': int((cached_at + timedelta(seconds=SAFETY_REPORT_CACHE_SECONDS)).timestamp()),
+        }
+    )
+
+
+def release_lease(table, work_order_id, request_id):
+    """
+    Let the next safety check for the work order start, unless the lease already expired and was
+    taken over by another request.
+    """
+    try:
+        table.delete_item(
+            Key={'requestId': f"{LEASE_KEY_PREFIX}{work_order_id}"},
+            ConditionExpression='leaseRequestId = :request_id',
+            ExpressionAttributeValues={':request_id': request_id},
+        )
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"Lease for work order {work_order_id} is no longer held by {request_id}")
+
+
+def renew_lease(table, work_order_id, request_id):
+    """Extend the work order's lease by a full lifetime while the request waits in its lane."""
+    now = datetime.utcnow()
+    try:
+        table.update_item(
+            Key={'requestId': f"{LEASE_KEY_PREFIX}{work_order_id}"},
+            UpdateExpression='SET expiresAt = :expiresAt, #ttl = :ttl',
+            ConditionExpression='leaseRequestId = :request_id',
+            ExpressionAttributeNames={'#ttl': 'ttl'},
+            ExpressionAttributeValues={
+                ':request_id': request_id,
+                ':expiresAt': (now + timedelta(seconds=SAFETY_CHECK_LEASE_SECONDS)).isoformat(),
+                ':ttl': int((now + timedelta(seconds=SAFETY_CHECK_LEASE_SECONDS)).timestamp()),
+            },
+        )
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"Lease for work order {work_order_id} is no longer held by {request_id}")
+
+
+def mark_failed(table, request_id, unfinished=('PENDING', 'QUEUED', 'RUNNING')):
+    """
+    Fail a request that is still in one of the `unfinished` states, so the status endpoint reports
+    it instead of leaving clients polling. It then expires like a completed request. Returns False
+    when the request had already moved on.
+    """
+    try:
+        table.update_item(
+            Key={'requestId': request_id},
+            UpdateExpression='SET #status = :failed, #error = :error, #updatedAt = :updatedAt, #ttl = :ttl REMOVE #claimExpiresAt, #eta',
+            ConditionExpression=f"#status IN ({', '.join(f':unfinished{index}' for index in range(len(unfinished)))})",
+            ExpressionAttributeNames={
+                '#status': 'status',
+                '#error': 'error',
+                '#updatedAt': 'updatedAt',
+                '#ttl': 'ttl',
+                '#claimExpiresAt': 'claimExpiresAt',
+                '#eta': 'eta'
+            },
+            ExpressionAttributeValues={
+                ':failed': 'FAILED',
+                **{f':unfinished{index}': status for index, status in enumerate(unfinished)},
+                ':error': 'The safety check could not be completed, please try again.',
+                ':updatedAt': datetime.utcnow().isoformat(),
+                ':ttl': int(time.time()) + COMPLETED_REQUEST_TTL_SECONDS
+            }
+        )
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"Safety check {request_id} already finished")
+        return False
+    return True
+
+
+def read_unrouted_requests(batch_info):
+    """
+    Read back the new PENDING requests of a stream batch the router gave up on. The on-failure
+    message only carries the batch's shard and sequence range, so the records come from the stream.
+    """
+    shard_iterator = dynamodbstreams_client.get_shard_iterator(
+        StreamArn=batch_info['streamArn'],
+        ShardId=batch_info['shardId'],
+        ShardIteratorType='AT_SEQUENCE_NUMBER',
+        SequenceNumber=batch_info['startSequenceNumber'],
+    )['ShardIterator']
+    last_sequence_number = int(batch_info['endSequenceNumber'])
+    requests = []
+    while shard_iterator:
+        response = dynamodbstreams_client.get_records(ShardIterator=shard_iterator)
+        for record in response['Records']:
+            if int(record['dynamodb']['SequenceNumber']) > last_sequence_number:
+                return requests
+            # Same filter as the router's mapping
+            image = record['dynamodb'].get('NewImage', {})
+            if record['eventName'] == 'INSERT' and image.get('status', {}).get('S') == 'PENDING':
+                requests.append({name: deserializer.deserialize(value) for name, value in image.items()})
+        if not response['Records']:
+            break
+        shard_iterator = response.get('NextShardIterator')
+    return requests
+
+
+def save_progress(table, request_id, partial_response, sequence):
+    """
+    Persist the report assembled so far on the request item. The condition keeps the writes
+    ordered and never touches a request that has already completed.
+    """
+    try:
+        table.update_item(
+            Key={'requestId': request_id},
+            UpdateExpression='SET #partialResponse = :partialResponse, #progressSequence = :sequence, #updatedAt = :updatedAt',
+            ConditionExpression='#status = :running AND (attribute_not_exists(#progressSequence) OR #progressSequence < :sequence)',
+            ExpressionAttributeNames={
+                '#partialResponse': 'partialResponse',
+                '#progressSequence': 'progressSequence',
+                '#updatedAt': 'updatedAt',
+                '#status': 'status'
+            },
+            ExpressionAttributeValues={
+                ':partialResponse': partial_response,
+                ':sequence': sequence,
+                ':updatedAt': datetime.utcnow().isoformat(),
+                ':running': 'RUNNING'
+            }
+        )
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"Skipped progress {sequence} for safety check {request_id}")
+
+
+def settle_cancelled_completion(table, error, request_id, work_order_id):
+    """
+    Settle a completing transaction cancelled by one of its conditions. Neither case gets better on
+    a retry, so the message is not redelivered. Returns False when the cancellation had another
+    cause (e.g. a conflicting transaction) and the run should be retried.
+    """
+    request_reason, work_order_reason = (reason.get('Code') for reason in error.response.get('CancellationReasons', [{}, {}]))
+    if request_reason == 'ConditionalCheckFailed':
+        # The claim expired and was taken over; the run that holds it now owns the request and lease
+        logger.info(f"Safety check {request_id} was claimed by another run, dropping this result")
+        if is_finished(table, request_id):
+            release_lease(table, work_order_id, request_id)
+        return True
+    if work_order_reason == 'ConditionalCheckFailed':
+        logger.info(f"Work order {work_order_id} of safety check {request_id} does not exist")
+        mark_failed(table, request_id, unfinished=('RUNNING',))
+        release_lease(table, work_order_id, request_id)
+        return True
+    return False
+
+
+def complete_request(request_id, work_order_id, safetycheckresponse, claim_expires_at):
+    """Store the report on the request and its work order in one conditional transaction."""
+    updated_at = datetime.utcnow()
+    dynamodb.meta.client.transact_write_items(
+        TransactItems=[
+            {
+                'Update': {
+                    'TableName': WORK_ORDER_REQUEST_TABLE_NAME,
+                    'Key': {'requestId': {'S': request_id}},
+                    'UpdateExpression': 'SET #status = :status, #safetycheckresponse = :safetycheckresponse, #updatedAt = :updatedAt, #ttl = :ttl REMOVE #partialResponse, #claimExpiresAt',
+                    'ConditionExpression': '#status = :running AND #claimExpiresAt = :claimExpiresAt',
+                    'ExpressionAttributeNames': {
+                        '#status': 'status',
+                        '#claimExpiresAt': 'claimExpiresAt',
+                        '#safetycheckresponse': 'safetycheckresponse',
+                        '#updatedAt': 'updatedAt',
+                        '#ttl': 'ttl',
+                        '#partialResponse': 'partialResponse'
+                    },
+                    'ExpressionAttributeValues': {
+                        ':status': {'S': 'COMPLETED'},
+                        ':running': {'S': 'RUNNING'},
+                        ':claimExpiresAt': {'N': str(claim_expires_at)},
+                        ':safetycheckresponse': {'S': safetycheckresponse},
+                        ':updatedAt': {'S': updated_at.isoformat()},
+                        ':ttl': {'N': str(int(time.time()) + COMPLETED_REQUEST_TTL_SECONDS)}
+                    }
+                }
+            },
+            {
+                'Update': {
+                    'TableName': WORK_ORDER_TABLE_NAME,
+                    'Key': {'work_order_id': {'S': work_order_id}},
+                    'UpdateExpression': 'SET #safetycheckresponse = :safetycheckresponse, #safetyCheckPerformedAt = :safetyCheckPerformedAt, #updatedAt = :updatedAt, #updated_day = :updated_day',
+                    'ConditionExpression': 'attribute_exists(#work_order_id)',
+                    'ExpressionAttributeNames': {
+                        '#work_order_id': 'work_order_id',
+                        '#safetycheckresponse': 'safetycheckresponse',
+                        '#safetyCheckPerformedAt': 'safetyCheckPerformedAt',
+                        '#updatedAt': 'updatedAt',
+                        '#updated_day': 'updated_day'
+                    },
+                    'ExpressionAttributeValues': {
+                        ':safetycheckresponse': {'S': safetycheckresponse},
+                        ':safetyCheckPerformedAt': {'S': updated_at.isoformat()},
+                        ':updatedAt': {'S': updated_at.isoformat(timespec='microseconds')},
+                        ':updated_day': {'S': updated_at.date().isoformat()}
+                    }
+                }
+            },
+        ]
+    )
+
+
+def get_agent_response(response, on_progress=None):
+    """
+    Assemble the agent's answer from all completion chunks. `on_progress(partial_text, sequence)`
+    is called with the text so far every PROGRESS_CHUNKS chunks or PROGRESS_INTERVAL_MS.
+    """
     logger.info(f"Getting agent response... {response}")
     if "completion" not in response:
         return f"No completion found in response: {response}"
 
+    # Chunks can split a multi-byte character, so decode the whole buffer rather than each chunk
+    buffer = bytearray()
+    sequence = 0
+    pending_chunks = 0
+    last_progress = time.monotonic()
     for event in response["completion"]:
         log(f"Event keys: {event.keys()}")
 
@@ -45,12 +445,21 @@ def get_agent_response(response):
         if "chunk" in event:
             # Extract the bytes from the chunk
             chunk_bytes = event["chunk"]["bytes"]
+            buffer.extend(chunk_bytes)
+            pending_chunks += 1
 
-            # Convert bytes to string, assuming UTF-8 encoding
-            chunk_text = chunk_bytes.decode("utf-8")
+            if on_progress is not None and (
+                pending_chunks >= PROGRESS_CHUNKS
+                or (time.monotonic() - last_progress) * 1000 >= PROGRESS_INTERVAL_MS
+            ):
+                sequence += 1
+                # An incomplete trailing character is left for the next write
+                on_progress(buffer.decode("utf-8", errors="ignore"), sequence)
+                pending_chunks = 0
+                last_progress = time.monotonic()
 
             # Print the response text
-            print("Response from the agent:", chunk_text)
+            print("Response from the agent:", chunk_bytes.decode("utf-8", errors="replace"))
             # If there are citations with more detailed responses, print them
             if (
                 "attribution" in event["chunk"]
@@ -66,17 +475,93 @@ def get_agent_response(response):
                         ]["text"]
                         print("Detailed response part:", text_part)
 
+    # Convert bytes to string, assuming UTF-8 encoding
+    return buffer.decode("utf-8")
+
+
+def process_request(request_id, work_order_id, payload, payload_hash):
+    ddsafetycheckrequesttable = dynamodb.Table(WORK_ORDER_REQUEST_TABLE_NAME)
+
+    logger.info(payload)
+    # SQS delivers at least once and the router may send a request twice; only the run that claims
+    # it invokes the agents. A duplicate leaves the lease to the run that owns it, unless that run
+    # already finished and failed before it could release the lease.
+    claim_expires_at = claim_request(ddsafetycheckrequesttable, request_id)
+    if not claim_expires_at:
+        if is_finished(ddsafetycheckrequesttable, request_id):
+            release_lease(ddsafetycheckrequesttable, work_order_id, request_id)
+        return
+
+    try:
+        # Admission control: wait for a token instead of letting Bedrock throttle everyone
+        retry_after = acquire_agent_token(ddsafetycheckrequesttable)
+        if retry_after:
+            mark_queued(ddsafetycheckrequesttable, request_id, retry_after)
+            raise AgentCapacityExceeded(retry_after)
+
+        # invoke the agent API
+        try:
+            agentResponse = bedrock_agent_runtime_client.invoke_agent(
+            inputText=payload,
+            agentId=AGENT_ID,
+            agentAliasId=AGENT_ALIAS_ID,
+            sessionId=request_id,
+            enableTrace=False,
+            endSession=False
+            )
+        except bedrock_agent_runtime_client.exceptions.ThrottlingException:
+            # The bucket is tuned too high for the current quota; back off like an empty bucket
+            retry_after = 60 / AGENT_RATE_PER_MINUTE * AGENT_BURST
+            mark_queued(ddsafetycheckrequesttable, request_id, retry_after)
+            raise AgentCapacityExceeded(retry_after)
+        response = get_agent_response(
+            agentResponse,
+            on_progress=lambda partial_response, sequence: save_progress(
+                ddsafetycheckrequesttable, request_id, partial_response, sequence
+            ),
+        )
 
-    return chunk_text
+        # Serialize the report once; the request, the work order and the cache all store this copy
+        safetycheckresponse = json.dumps(response)
+
+        # Complete the request and update the work order (with the delta-sync change stamp) in one
+        # transaction, so readers never see one table updated without the other. It only commits
+        # while this run still holds the claim and the work order exists; an update must not
+        # overwrite another run's result or create a stub work order.
+        try:
+            complete_request(request_id, work_order_id, safetycheckresponse, claim_expires_at)
+        except dynamodb.meta.client.exceptions.TransactionCanceledException as e:
+            if settle_cancelled_completion(ddsafetycheckrequesttable, e, request_id, work_order_id):
+                return
+            raise
+
+        if payload_hash and SAFETY_REPORT_CACHE_SECONDS > 0:
+            # The request is already COMPLETED; a missing cache entry only costs a later agent run
+            try:
+                cache_safety_report(ddsafetycheckrequesttable, payload_hash, request_id, safetycheckresponse)
+            except Exception:
+                logger.exception(f"Could not cache the report of safety check {request_id}")
+
+    except AgentCapacityExceeded:
+        # Still in flight: the lease has to outlast the requeue delay
+        renew_lease(ddsafetycheckrequesttable, work_order_id, request_id)
+        raise
+
+    except Exception:
+        # Surface the failure so the record is reported back to the queue for redelivery. The lease
+        # stays with the request until its retry completes or it fails for good.
+        logger.exception(f"Safety check {request_id} for work order {work_order_id} failed")
+        release_claim(ddsafetycheckrequesttable, request_id)
+        raise
+
+    release_lease(ddsafetycheckrequesttable, work_order_id, request_id)
 
 
 @logger.inject_lambda_context(log_event=True)
 def lambda_handler(event, _context: LambdaContext):
     """
-    Lambda function to classify an image
-    @param event:
-    @param context:
-    @return:
+    Run the safety check agents for requests delivered by the high and normal priority lane
+    queues (see safety_check_router).
     """
 
     print("Invoke safety check function")
@@ -84,61 +569,56 @@ def lambda_handler(event, _context: LambdaContext):
     print("The event")
     print(event)
 
-    ddsafetycheckrequesttable = dynamodb.Table(WORK_ORDER_REQUEST_TABLE_NAME)
-    ddworkordertable = dynamodb.Table(WORK_ORDER_TABLE_NAME)
-    for record in event['Records']:
-        if record['eventName'] == 'INSERT':
-            request_id = record['dynamodb']['NewImage']['requestId']['S']
-            work_order_id = record['dynamodb']['NewImage']['work_order_id']['S']
-            payload = record['dynamodb']['NewImage']['payload']['S']
+    def process_record(record):
+        message = json.loads(record['body'])
+        try:
+            process_request(
+                message['requestId'],
+                message['work_order_id'],
+                message['payload'],
+                message.get('payloadHash'),
+            )
+        except AgentCapacityExceeded as e:
+            delay = requeue(record, message, e.retry_after)
+            logger.info(f"Safety check {message['requestId']} queued for {delay}s, agent capacity exhausted")
 
-            logger.info(payload)
-            try:
-                # invoke the agent API
-                agentResponse = bedrock_agent_runtime_client.invoke_agent(
-                inputText=payload,
-                agentId=AGENT_ID,
-                agentAliasId=AGENT_ALIAS_ID,
-                sessionId=request_id,
-                enableTrace=False,
-                endSession=False
-                )
-                response = get_agent_response(agentResponse)
-
-                ddsafetycheckrequesttable.update_item(
-                    Key={
-                        'requestId': request_id
-                    },
-                    UpdateExpression='SET #status = :status, #safetycheckresponse = :safetycheckresponse, #updatedAt = :updatedAt',
-                    ExpressionAttributeNames={
-                        '#status': 'status',
-                        '#safetycheckresponse': 'safetycheckresponse',
-                        '#updatedAt': 'updatedAt'
-                    },
-                    ExpressionAttributeValues={
-                        ':status': 'COMPLETED',
-                        ':safetycheckresponse': json.dumps(response),
-                        ':updatedAt': datetime.utcnow().isoformat()
-                    }
-                )
+    records = event['Records']
+    batch_item_failures = []
+    # Run the batch's agent calls side by side; a slow or failed record only costs its own slot
+    with ThreadPoolExecutor(max_workers=max(1, min(len(records), MAX_AGENT_WORKERS)), thread_name_prefix="safety-check") as executor:
+        futures = [(record, executor.submit(process_record, record)) for record in records]
+        for record, future in futures:
+            if future.exception() is not None:
+                batch_item_failures.append({'itemIdentifier': record['messageId']})
 
-                # Update work order table with safety check response
-                ddworkordertable.update_item(
-                    Key={
-                        'work_order_id': work_order_id
-                    },
-                    UpdateExpression='SET #safetycheckresponse = :safetycheckresponse, #safetyCheckPerformedAt = :safetyCheckPerformedAt',
-                    ExpressionAttributeNames={
-                        '#safetycheckresponse': 'safetycheckresponse',
-                        '#safetyCheckPerformedAt': 'safetyCheckPerformedAt'
-                    },
-                    ExpressionAttributeValues={
-                        ':safetycheckresponse': json.dumps(response),
-                        ':safetyCheckPerformedAt': datetime.utcnow().isoformat()
-                    }
-                )
+    if batch_item_failures:
+        logger.info(f"{len(batch_item_failures)} of {len(records)} safety checks failed and will be retried")
+    # Only the failed messages return to the queue; the rest of the batch is deleted
+    return {'batchItemFailures': batch_item_failures}
 
-            except Exception as e:
-                logger.info(e)
 
-    
\ No newline at end of file
+@logger.inject_lambda_context(log_event=True)
+def dead_letter_handler(event, _context: LambdaContext):
+    """
+    Fail the requests whose lane messages ran out of receives (or timed out on the last one), or
+    whose stream records the router could not queue, and free their work orders' leases.
+    """
+    ddsafetycheckrequesttable = dynamodb.Table(WORK_ORDER_REQUEST_TABLE_NAME)
+    batch_item_failures = []
+    for record in event['Records']:
+        try:
+            message = json.loads(record['body'])
+            if 'DDBStreamBatchInfo' in message:
+                # A request that got queued by an earlier router attempt is left to its processor
+                for request in read_unrouted_requests(message['DDBStreamBatchInfo']):
+                    if mark_failed(ddsafetycheckrequesttable, request['requestId'], unfinished=('PENDING',)):
+                        release_lease(ddsafetycheckrequesttable, request['work_order_id'], request['requestId'])
+                        logger.info(f"Safety check {request['requestId']} for work order {request['work_order_id']} could not be queued")
+                continue
+            mark_failed(ddsafetycheckrequesttable, message['requestId'])
+            release_lease(ddsafetycheckrequesttable, message['work_order_id'], message['requestId'])
+            logger.info(f"Safety check {message['requestId']} for work order {message['work_order_id']} failed for good")
+        except Exception:
+            logger.exception(f"Could not fail dead-lettered message {record['messageId']}")
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+    return {'batchItemFailures': batch_item_failures}
@@ -0,0 +1,71 @@
+import json
+import os
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+logger = Logger()
+
+HIGH_PRIORITY_QUEUE_URL = os.getenv("HIGH_PRIORITY_QUEUE_URL")
+NORMAL_PRIORITY_QUEUE_URL = os.getenv("NORMAL_PRIORITY_QUEUE_URL")
+# Work orders with a priority at or below this (1 is the most urgent) take the high priority lane
+HIGH_PRIORITY_MAX = int(os.getenv("HIGH_PRIORITY_MAX", "2"))
+
+# SendMessageBatch accepts at most 10 messages
+SEND_BATCH_SIZE = 10
+
+sqs_client = boto3.client('sqs')
+deserializer = TypeDeserializer()
+
+
+def is_high_priority(request):
+    try:
+        return int(request.get('priority')) <= HIGH_PRIORITY_MAX
+    except (TypeError, ValueError):
+        return False
+
+
+def send_messages(queue_url, requests):
+    for start in range(0, len(requests), SEND_BATCH_SIZE):
+        chunk = requests[start:start + SEND_BATCH_SIZE]
+        response = sqs_client.send_message_batch(
+            QueueUrl=queue_url,
+            Entries=[
+                {
+                    'Id': str(index),
+                    'MessageBody': json.dumps({
+                        'requestId': request['requestId'],
+                        'work_order_id': request['work_order_id'],
+                        'payload': request['payload'],
+                        'payloadHash': request.get('payloadHash'),
+                    }),
+                }
+                for index, request in enumerate(chunk)
+            ],
+        )
+        if response.get('Failed'):
+            # Fail the batch so the stream redelivers it. The messages already sent are sent again,
+            # and the processor's RUNNING claim on the request skips those duplicates.
+            raise RuntimeError(f"Failed to queue {len(response['Failed'])} safety check requests: {response['Failed']}")
+
+
+@logger.inject_lambda_context
+def lambda_handler(event, _context: LambdaContext):
+    """
+    Route new PENDING safety check requests from the requests table stream to the high or normal
+    priority lane queue by their work order's priority. Each lane is drained by the processor
+    with its own concurrency limit, so urgent checks don't queue behind routine ones.
+    """
+    lanes = {HIGH_PRIORITY_QUEUE_URL: [], NORMAL_PRIORITY_QUEUE_URL: []}
+    for record in event['Records']:
+        image = record['dynamodb']['NewImage']
+        request = {name: deserializer.deserialize(value) for name, value in image.items()}
+        lane = HIGH_PRIORITY_QUEUE_URL if is_high_priority(request) else NORMAL_PRIORITY_QUEUE_URL
+        lanes[lane].append(request)
+
+    for queue_url, requests in lanes.items():
+        if requests:
+            send_messages(queue_url, requests)
+    logger.info(f"Queued {len(lanes[HIGH_PRIORITY_QUEUE_URL])} high and {len(lanes[NORMAL_PRIORITY_QUEUE_URL])} normal priority safety checks")
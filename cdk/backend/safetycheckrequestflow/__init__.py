@@ -15,6 +15,7 @@ from aws_cdk import (
 from constructs import Construct
 from cdk_nag import NagSuppressions, NagPackSuppression
 import core_constructs as core
+from ..safetycheckprocessorflow import SAFETY_CHECK_LEASE_SECONDS
 
 
 class SafetyCheckRequestStack(Construct):
@@ -24,7 +25,10 @@ class SafetyCheckRequestStack(Construct):
         scope: Construct,
         construct_id: str,
         api_gateway: core.CoreApiGateway,
-        work_order_requests_table: dynamodb.Table
+        work_order_requests_table: dynamodb.Table,
+        shared_layer: lambda_.ILayerVersion,
+        dynamo_db_workorder_table: str,
+        dynamo_db_location_table: str,
     ) -> None:
         super().__init__(scope, construct_id)
 
@@ -51,10 +55,17 @@ class SafetyCheckRequestStack(Construct):
             runtime=lambda_.Runtime.PYTHON_3_13,
             timeout=Duration.seconds(90),
             memory_size=512,
+            layers=[shared_layer],
             environment={
                 "LOG_LEVEL": "DEBUG",
                 "POWERTOOLS_SERVICE_NAME": "SafetyCheckRequestFlow",
                 "work_order_requests_table": work_order_requests_table.table_name,
+                "WORK_ORDER_TABLE_NAME": dynamo_db_workorder_table,
+                "LOCATION_TABLE_NAME": dynamo_db_location_table,
+                "SAFETY_REPORT_CACHE_SECONDS": "3600",
+                "SAFETY_CHECK_LEASE_SECONDS": str(SAFETY_CHECK_LEASE_SECONDS),
+                "PENDING_REQUEST_TTL_SECONDS": "86400",
+                "COMPLETED_REQUEST_TTL_SECONDS": "604800",
             },
         )
 
@@ -64,6 +75,15 @@ class SafetyCheckRequestStack(Construct):
         safet_check_request_fn_plicy = iam.Policy(self, "SafetyCheckReqiestFnPolicy")
 
         safet_check_request_fn_plicy.add_statements(
+            iam.PolicyStatement(
+                sid="WorkOrderReads",
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "dynamodb:BatchGetItem",
+                    "dynamodb:GetItem",
+                ],
+                resources=["*"],
+            ),
             iam.PolicyStatement(
                 effect=iam.Effect.ALLOW,
                 actions=[
@@ -83,7 +103,7 @@ class SafetyCheckRequestStack(Construct):
             [
                 NagPackSuppression(
                     id="AwsSolutions-IAM5",
-                    reason="This Lambda has wildcard permissions to allow CloudWatch Logs log groups.",
+                    reason="This Lambda has wildcard permissions to read the work order and location Dynamo tables and manage CloudWatch Logs log groups.",
                 )
             ],
             True,
@@ -112,6 +132,7 @@ class SafetyCheckRequestStack(Construct):
             runtime=lambda_.Runtime.PYTHON_3_13,
             timeout=Duration.seconds(90),
             memory_size=512,
+            layers=[shared_layer],
             environment={
                 "LOG_LEVEL": "DEBUG",
                 "POWERTOOLS_SERVICE_NAME": "SafetyCheckPollingFlow",
@@ -153,6 +174,84 @@ class SafetyCheckRequestStack(Construct):
 
 
 
+        # Define function name first
+        batch_function_name = f"{construct_id.lower()}-workorder-batch-request"
+
+        # Create explicit log group for bulk safety check request function
+        safety_check_batch_log_group = logs.LogGroup(
+            self,
+            "SafetyCheckBatchLogGroup",
+            log_group_name=f"/aws/lambda/{batch_function_name}",
+            retention=logs.RetentionDays.ONE_WEEK,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # a lambda function submitting safety checks for many work orders at once; shares the
+        # single request function's code (report cache, in-flight leases)
+        safety_check_batch_fn = lambda_python.PythonFunction(
+            self,
+            "WorkOrderBatchRequest",
+            function_name=batch_function_name,
+            entry=f"{os.path.dirname(os.path.realpath(__file__))}/safetycheckrequest",
+            index="index.py",
+            handler="batch_handler",
+            runtime=lambda_.Runtime.PYTHON_3_13,
+            timeout=Duration.seconds(90),
+            memory_size=512,
+            layers=[shared_layer],
+            environment={
+                "LOG_LEVEL": "DEBUG",
+                "POWERTOOLS_SERVICE_NAME": "SafetyCheckRequestFlow",
+                "work_order_requests_table": work_order_requests_table.table_name,
+                "WORK_ORDER_TABLE_NAME": dynamo_db_workorder_table,
+                "LOCATION_TABLE_NAME": dynamo_db_location_table,
+                "SAFETY_REPORT_CACHE_SECONDS": "3600",
+                "SAFETY_CHECK_LEASE_SECONDS": str(SAFETY_CHECK_LEASE_SECONDS),
+                "PENDING_REQUEST_TTL_SECONDS": "86400",
+                "COMPLETED_REQUEST_TTL_SECONDS": "604800",
+                "MAX_BATCH_WORK_ORDERS": "50",
+            },
+        )
+
+        work_order_requests_table.grant_read_write_data(safety_check_batch_fn)
+
+        safety_check_batch_fn_policy = iam.Policy(self, "SafetyCheckBatchFnPolicy")
+
+        safety_check_batch_fn_policy.add_statements(
+            iam.PolicyStatement(
+                sid="WorkOrderReads",
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "dynamodb:BatchGetItem",
+                    "dynamodb:GetItem",
+                ],
+                resources=["*"],
+            ),
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "logs:CreateLogGroup",
+                    "logs:CreateLogStream",
+                    "logs:PutLogEvents",
+                ],
+                resources=["*"],
+            ),
+        )
+
+        # Attach the IAM policy to the Lambda function's role
+        safety_check_batch_fn.role.attach_inline_policy(safety_check_batch_fn_policy)
+
+        NagSuppressions.add_resource_suppressions(
+            safety_check_batch_fn_policy,
+            [
+                NagPackSuppression(
+                    id="AwsSolutions-IAM5",
+                    reason="This Lambda has wildcard permissions to read the work order and location Dynamo tables and manage CloudWatch Logs log groups.",
+                )
+            ],
+            True,
+        )
+
         # create optimization job API method
         api_gateway.add_method(
             resource_path="/safetycheck/request",
@@ -161,6 +260,14 @@ class SafetyCheckRequestStack(Construct):
             request_validator=api_gateway.request_body_validator,
         )
 
+        # bulk submission, one round trip for a whole crew's day
+        api_gateway.add_method(
+            resource_path="/safetycheck/batch",
+            http_method="POST",
+            lambda_function=safety_check_batch_fn,
+            request_validator=api_gateway.request_body_validator,
+        )
+
         # create optimization job API method
         api_gateway.add_method(
             resource_path="/safetycheck/status",
@@ -216,4 +323,28 @@ class SafetyCheckRequestStack(Construct):
                 },
             ],
             True,
-        )
\ No newline at end of file
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            safety_check_batch_fn,
+            [
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": """Certain policies will implement wildcard permissions to expedite development. 
+            TODO: Replace on Production environment (Path to Production)""",
+                },
+                {
+                    "id": "AwsSolutions-IAM4",
+                    "reason": """Prototype will use managed policies to expedite development. 
+                        TODO: Replace on Production environment (Path to Production)""",
+                    "appliesTo": [
+                        "Policy::arn:<AWS::Partition>:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-L1",
+                    "reason": """Policy managed by AWS can not specify a different runtime version""",
+                },
+            ],
+            True,
+        )
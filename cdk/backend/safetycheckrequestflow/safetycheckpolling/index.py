@@ -8,6 +8,7 @@ from aws_lambda_powertools.utilities.typing import LambdaContext
 from aws_lambda_powertools import Logger
 
 from aws_lambda_powertools import Logger
+from api_response import build_response, parse_json_body
 
 logger = Logger()
 def log(message):
@@ -24,7 +25,7 @@ def lambda_handler(event, _context: LambdaContext):
     try:
         print(event)
 
-        event_body = json.loads(event["body"])
+        event_body = parse_json_body(event)
         # Generate unique request ID
         request_id = event_body['requestId']
             
@@ -44,6 +45,20 @@ def lambda_handler(event, _context: LambdaContext):
         item = response['Item']
 
         if item['status'] != 'COMPLETED':
+            status = {
+                'requestId': request_id,
+                'status': item['status']
+            }
+            # Report assembled so far by the processor, while the agent is still answering
+            if 'partialResponse' in item:
+                status['partialResponse'] = item['partialResponse']
+                status['progressSequence'] = int(item['progressSequence'])
+            # Requests waiting for agent capacity carry the time they are expected to start
+            if 'eta' in item:
+                status['eta'] = item['eta']
+            # Failed requests (retries exhausted) say so, so clients stop polling
+            if 'error' in item:
+                status['error'] = item['error']
             return {
                 'statusCode': 202,
                 'headers': {
@@ -51,25 +66,15 @@ def lambda_handler(event, _context: LambdaContext):
                     'Access-Control-Allow-Origin': '*',
                     'Access-Control-Allow-Credentials': 'true'
                 },
-                'body': json.dumps({
-                    'requestId': request_id,
-                    'status': item['status']
-                })
+                'body': json.dumps(status)
             }
 
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': 'true'
-            },
-            'body': json.dumps({
-                'requestId': request_id,
-                'status': 'COMPLETED',
-                'safetycheckresponse': item['safetycheckresponse']
-            })
-        }
+        # The report is large HTML, compress it when the client accepts it
+        return build_response(200, {
+            'requestId': request_id,
+            'status': 'COMPLETED',
+            'safetycheckresponse': item['safetycheckresponse']
+        }, event)
 
 
     except Exception as e:
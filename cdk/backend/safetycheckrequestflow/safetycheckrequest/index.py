@@ -1,79 +1,360 @@
 import json
 import boto3
+import hashlib
+import time
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import os
 
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from aws_lambda_powertools import Logger
 
 from aws_lambda_powertools import Logger
+from api_response import build_response, parse_json_body
 
 logger = Logger()
 def log(message):
     logger.info(message)
 
 work_order_requests_table = os.getenv("work_order_requests_table")
+WORK_ORDER_TABLE_NAME = os.getenv("WORK_ORDER_TABLE_NAME")
+LOCATION_TABLE_NAME = os.getenv("LOCATION_TABLE_NAME")
+# Bulk submissions: work orders per call, and concurrent lease writes
+MAX_BATCH_WORK_ORDERS = int(os.getenv("MAX_BATCH_WORK_ORDERS", "50"))
+LEASE_WORKERS = 10
+# BatchGetItem accepts at most 100 keys per call; unprocessed keys are retried with backoff
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 5
+# Same query the console sends for a single work order
+DEFAULT_SAFETY_CHECK_QUERY = "Perform work order safety checks for WorkOrder::"
+# How long a completed safety report is served for identical requests; 0 disables the cache
+SAFETY_REPORT_CACHE_SECONDS = int(os.getenv("SAFETY_REPORT_CACHE_SECONDS", "3600"))
+# Cache entries share the requests table under this requestId prefix (see safety_check_fn)
+CACHE_KEY_PREFIX = "cache#"
+# Request items expire (DynamoDB TTL) this long after insert, or after completion once completed;
+# expired requests are archived to S3 by the safety check archive flow
+PENDING_REQUEST_TTL_SECONDS = int(os.getenv("PENDING_REQUEST_TTL_SECONDS", "86400"))
+COMPLETED_REQUEST_TTL_SECONDS = int(os.getenv("COMPLETED_REQUEST_TTL_SECONDS", str(7 * 86400)))
+# One in-flight safety check per work order: the lease item's requestId prefix and lifetime. The
+# lifetime covers every delivery of the request (lane receives x visibility timeout, plus a
+# requeue delay; see SafetyCheckProcessorStack), so a retry never runs alongside a new check,
+# while a request lost for good still can't block its work order forever.
+LEASE_KEY_PREFIX = "lease#"
+SAFETY_CHECK_LEASE_SECONDS = int(os.getenv("SAFETY_CHECK_LEASE_SECONDS", "4140"))
+# The only attributes the agents are given, in the prompt's canonical payload
+AGENT_WORK_ORDER_FIELDS = (
+    'work_order_id',
+    'description',
+    'location_name',
+    'asset_id',
+    'status',
+    'scheduled_start_timestamp',
+    'scheduled_finish_timestamp',
+    'owner_name',
+    'priority',
+)
+AGENT_LOCATION_FIELDS = ('location_name', 'description', 'latitude', 'longitude', 'address')
 # Initialize DynamoDB 
 dynamodb = boto3.resource('dynamodb')
 
 
+def expires_in(seconds):
+    """Epoch seconds `seconds` from now, for the requests table's ttl attribute."""
+    return int(time.time()) + seconds
+
+
+def pick(item, fields):
+    return {field: item[field] for field in fields if item.get(field) not in (None, '')}
+
+
+def build_payload(query_object, work_order):
+    """
+    Assemble the agents' prompt from a work order loaded server-side (see load_work_orders): the
+    whitespace-normalized query followed by minified JSON with sorted keys holding only the
+    AGENT_*_FIELDS. Identical inputs always produce identical payloads.
+    """
+    details = pick(work_order, AGENT_WORK_ORDER_FIELDS)
+    if work_order.get('location_details'):
+        details['location_details'] = pick(work_order['location_details'], AGENT_LOCATION_FIELDS)
+    workorderdetails = {'work_order_id': work_order['work_order_id'], 'workOrderLocationAssetDetails': details}
+    query = " ".join(str(query_object).split())
+    return f"{query} {json.dumps(workorderdetails, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+def payload_hash(payload):
+    """Content address of a safety check request: SHA-256 of its canonical payload."""
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_report(table, content_hash):
+    """
+    The cached report for `content_hash` if it was produced within the freshness window.
+    """
+    if not content_hash or SAFETY_REPORT_CACHE_SECONDS <= 0:
+        return None
+    entry = table.get_item(Key={'requestId': f"{CACHE_KEY_PREFIX}{content_hash}"}).get('Item')
+    if not entry:
+        return None
+    cached_at = datetime.fromisoformat(entry['cachedAt'])
+    if datetime.utcnow() - cached_at > timedelta(seconds=SAFETY_REPORT_CACHE_SECONDS):
+        return None
+    return entry
+
+
+def acquire_lease(table, work_order_id, request_id):
+    """
+    Take the work order's in-flight lease for `request_id` with a conditional write. Returns None
+    when acquired, otherwise the requestId of the safety check already running.
+    """
+    now = datetime.utcnow()
+    try:
+        table.put_item(
+            Item={
+                'requestId': f"{LEASE_KEY_PREFIX}{work_order_id}",
+                'leaseRequestId': request_id,
+                'expiresAt': (now + timedelta(seconds=SAFETY_CHECK_LEASE_SECONDS)).isoformat(),
+                'ttl': int((now + timedelta(seconds=SAFETY_CHECK_LEASE_SECONDS)).timestamp()),
+            },
+            ConditionExpression='attribute_not_exists(requestId) OR expiresAt < :now',
+            ExpressionAttributeValues={':now': now.isoformat()},
+            ReturnValuesOnConditionCheckFailure='ALL_OLD',
+        )
+        return None
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException as e:
+        return e.response.get('Item', {}).get('leaseRequestId', {}).get('S')
+
+
+def release_lease(table, work_order_id, request_id):
+    try:
+        table.delete_item(
+            Key={'requestId': f"{LEASE_KEY_PREFIX}{work_order_id}"},
+            ConditionExpression='leaseRequestId = :request_id',
+            ExpressionAttributeValues={':request_id': request_id},
+        )
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+
+
 @logger.inject_lambda_context(log_event=True)
 def lambda_handler(event, _context: LambdaContext):
+    """
+    Start a safety check: {"work_order_id": "...", "query": "..."} -> {"requestId": "..."}
+
+    The work order and its location are loaded server-side to build the prompt, so only the id
+    is needed. The console's older {"query", "workorderdetails": {"work_order_id", ...}} body is
+    still accepted, but only its work_order_id is used.
+    """
     try:
-        print(event)
+        try:
+            event_body = parse_json_body(event)
+        except ValueError:
+            return build_response(400, {'error': 'Request body must be valid JSON'}, event)
+        if not isinstance(event_body, dict):
+            return build_response(400, {'error': 'Request body must be a JSON object'}, event)
+
+        work_order_id = event_body.get('work_order_id') or (event_body.get('workorderdetails') or {}).get('work_order_id')
+        if not work_order_id:
+            return build_response(400, {'error': 'work_order_id is required'}, event)
+        query_object = event_body.get('query') or DEFAULT_SAFETY_CHECK_QUERY
+
+        work_order = load_work_orders([str(work_order_id)]).get(str(work_order_id))
+        if work_order is None:
+            return build_response(404, {'error': f'Work order {work_order_id} not found'}, event)
 
-        event_body = json.loads(event["body"])
         # Generate unique request ID
         request_id = str(uuid.uuid4())
-        
-        payload = json.dumps(event_body)
+        payload = build_payload(query_object, work_order)
+        content_hash = payload_hash(payload)
 
-        try:
-            # Extract query object
-            query_object = event_body['query']
-            workorderdetails = event_body['workorderdetails']
-            work_order_id = workorderdetails['work_order_id']
-            # Remove safetycheckresponse from nested workOrderLocationAssetDetails
-            if "workOrderLocationAssetDetails" in workorderdetails:
-                workOrderLocationAssetDetails = workorderdetails["workOrderLocationAssetDetails"]
-                if "safetycheckresponse" in workOrderLocationAssetDetails:
-                    del workOrderLocationAssetDetails["safetycheckresponse"]
-                if "safetyCheckPerformedAt" in workOrderLocationAssetDetails:
-                    del workOrderLocationAssetDetails["safetyCheckPerformedAt"]
-
-            # Create prompt string by concatenating query and workorder details
-            payload = f"{query_object} {json.dumps(workorderdetails)}"    
-        except Exception as ex:
-            logger.error(f"Error in getting work order: {str(ex)}")
-
-        logger.info('work_order_id is :',work_order_id)
-        logger.info('payload is :',payload)
+        logger.info(f"work_order_id is : {work_order_id}")
+        logger.info(f"payload is : {payload}")
         # Create DynamoDB item
         item = {
             'requestId': request_id,
-            'work_order_id': work_order_id,
+            'work_order_id': work_order['work_order_id'],
             'payload': payload,
+            'payloadHash': content_hash,
             'status': 'PENDING',
             'createdAt': datetime.utcnow().isoformat(),
+            'ttl': expires_in(PENDING_REQUEST_TTL_SECONDS),
         }
 
+        # Routes the request to the processor's high or normal priority lane
+        if work_order.get('priority') not in (None, ''):
+            item['priority'] = str(work_order['priority'])
+
         ddbworkordertable = dynamodb.Table(work_order_requests_table)
 
-        ddbworkordertable.put_item(Item=item)
+        cached = get_cached_report(ddbworkordertable, content_hash)
+        if cached:
+            # Same inputs answered recently: record the request as already COMPLETED. Only PENDING
+            # inserts reach the processor (see the stream filter), so the agents aren't invoked.
+            logger.info(f"Safety report cache hit for work order {work_order_id} from request {cached.get('sourceRequestId')}")
+            item.update({
+                'status': 'COMPLETED',
+                'safetycheckresponse': cached['safetycheckresponse'],
+                'cachedFrom': cached.get('sourceRequestId'),
+                'updatedAt': datetime.utcnow().isoformat(),
+                'ttl': expires_in(COMPLETED_REQUEST_TTL_SECONDS),
+            })
+            ddbworkordertable.put_item(Item=item)
+            return build_response(200, {"requestId": request_id, "status": "COMPLETED", "cached": True}, event)
 
-        return {
-                "statusCode": 202,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Credentials": "true"
-                },
-                "body": json.dumps({"requestId": request_id})
-            }
+        # Coalesce with a safety check already running for this work order
+        in_flight_request_id = acquire_lease(ddbworkordertable, item['work_order_id'], request_id)
+        if in_flight_request_id:
+            logger.info(f"Safety check {in_flight_request_id} already in flight for work order {work_order_id}")
+            request_id = in_flight_request_id
+        else:
+            try:
+                ddbworkordertable.put_item(Item=item)
+            except Exception:
+                release_lease(ddbworkordertable, item['work_order_id'], request_id)
+                raise
+
+        return build_response(202, {"requestId": request_id}, event)
     except Exception as e:
         logger.error(f"Lambda handler error: {str(e)}")
         return {'statusCode': 500, 'body': "error in processing request"}
-    
 
-    
\ No newline at end of file
+
+def batch_get(table_name, key_name, keys, attributes=None):
+    """
+    BatchGetItem `keys` from one table, BATCH_GET_MAX_KEYS per call, retrying unprocessed keys
+    with backoff. Only `attributes` (plus the key) are read when given. Returns {key: item}.
+    """
+    projection = {}
+    if attributes:
+        names = {f'#a{index}': name for index, name in enumerate([key_name, *attributes])}
+        projection = {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+    found = {}
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request_items = {table_name: {'Keys': [{key_name: key} for key in keys[start:start + BATCH_GET_MAX_KEYS]], **projection}}
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in response.get('Responses', {}).get(table_name, []):
+                found[item[key_name]] = item
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+            if attempt < BATCH_GET_MAX_RETRIES:
+                time.sleep(0.05 * (2 ** attempt))
+        else:
+            raise RuntimeError(f"Unprocessed keys left reading {table_name}")
+    return found
+
+
+def load_work_orders(work_order_ids):
+    """
+    Load the work orders, keyed by id, with their location_details attached.
+    """
+    work_orders = batch_get(WORK_ORDER_TABLE_NAME, 'work_order_id', work_order_ids)
+    location_names = {order['location_name'] for order in work_orders.values() if order.get('location_name')}
+    locations = batch_get(LOCATION_TABLE_NAME, 'location_name', sorted(location_names)) if location_names else {}
+    for work_order in work_orders.values():
+        work_order['location_details'] = locations.get(work_order.get('location_name'))
+    return {work_order_id: order for work_order_id, order in work_orders.items() if 'deletedAt' not in order}
+
+
+@logger.inject_lambda_context(log_event=True)
+def batch_handler(event, _context: LambdaContext):
+    """
+    Submit safety checks for many work orders at once:
+    {"workOrderIds": [...], "query": "..."} -> {"requests": [{"work_order_id", "requestId", "status"}]}
+
+    Prompts are assembled like single requests, every request item is written with BatchWriteItem, and
+    each work order goes through the same report cache and in-flight lease as a single request.
+    """
+    try:
+        try:
+            event_body = parse_json_body(event)
+        except ValueError:
+            return build_response(400, {'error': 'Request body must be valid JSON'}, event)
+        work_order_ids = event_body.get('workOrderIds') if isinstance(event_body, dict) else None
+        if not isinstance(work_order_ids, list) or not work_order_ids:
+            return build_response(400, {'error': 'workOrderIds must be a non-empty list'}, event)
+        work_order_ids = list(dict.fromkeys(str(work_order_id) for work_order_id in work_order_ids))
+        if len(work_order_ids) > MAX_BATCH_WORK_ORDERS:
+            return build_response(400, {'error': f'At most {MAX_BATCH_WORK_ORDERS} work orders per batch'}, event)
+        query_object = event_body.get('query') or DEFAULT_SAFETY_CHECK_QUERY
+
+        work_orders = load_work_orders(work_order_ids)
+        ddbworkordertable = dynamodb.Table(work_order_requests_table)
+
+        items = {}
+        for work_order_id, work_order in work_orders.items():
+            payload = build_payload(query_object, work_order)
+            items[work_order_id] = {
+                'requestId': str(uuid.uuid4()),
+                'work_order_id': work_order_id,
+                'payload': payload,
+                'payloadHash': payload_hash(payload),
+                'status': 'PENDING',
+                'createdAt': datetime.utcnow().isoformat(),
+                'ttl': expires_in(PENDING_REQUEST_TTL_SECONDS),
+            }
+            if work_order.get('priority') not in (None, ''):
+                items[work_order_id]['priority'] = str(work_order['priority'])
+
+        # Recently answered identical requests complete straight from the report cache
+        cached = {}
+        if items and SAFETY_REPORT_CACHE_SECONDS > 0:
+            cache_keys = sorted({f"{CACHE_KEY_PREFIX}{item['payloadHash']}" for item in items.values()})
+            entries = batch_get(work_order_requests_table, 'requestId', cache_keys)
+            fresh_after = datetime.utcnow() - timedelta(seconds=SAFETY_REPORT_CACHE_SECONDS)
+            cached = {
+                key: entry for key, entry in entries.items() if datetime.fromisoformat(entry['cachedAt']) >= fresh_after
+            }
+        for item in items.values():
+            entry = cached.get(f"{CACHE_KEY_PREFIX}{item['payloadHash']}")
+            if entry:
+                item.update({
+                    'status': 'COMPLETED',
+                    'safetycheckresponse': entry['safetycheckresponse'],
+                    'cachedFrom': entry.get('sourceRequestId'),
+                    'updatedAt': datetime.utcnow().isoformat(),
+                    'ttl': expires_in(COMPLETED_REQUEST_TTL_SECONDS),
+                })
+
+        # Coalesce the rest with safety checks already in flight
+        pending = [item for item in items.values() if item['status'] == 'PENDING']
+        with ThreadPoolExecutor(max_workers=LEASE_WORKERS) as executor:
+            in_flight = list(executor.map(
+                lambda item: acquire_lease(ddbworkordertable, item['work_order_id'], item['requestId']), pending
+            ))
+        # Report a coalesced entry with its in-flight request's current status, as the status
+        # endpoint would; a request whose item isn't written yet is still PENDING
+        in_flight_ids = sorted({request_id for request_id in in_flight if request_id})
+        in_flight_requests = batch_get(work_order_requests_table, 'requestId', in_flight_ids, ['status']) if in_flight_ids else {}
+        leased = []
+        for item, in_flight_request_id in zip(pending, in_flight):
+            if in_flight_request_id:
+                status = in_flight_requests.get(in_flight_request_id, {}).get('status', 'PENDING')
+                items[item['work_order_id']] = {'requestId': in_flight_request_id, 'status': status, 'coalesced': True}
+            else:
+                leased.append(item)
+
+        to_write = [item for item in items.values() if not item.get('coalesced')]
+        try:
+            with ddbworkordertable.batch_writer() as batch:
+                for item in to_write:
+                    batch.put_item(Item=item)
+        except Exception:
+            for item in leased:
+                release_lease(ddbworkordertable, item['work_order_id'], item['requestId'])
+            raise
+        logger.info(f"Submitted {len(to_write)} safety checks, {len(items) - len(to_write)} coalesced, {len(cached)} cached")
+
+        results = []
+        for work_order_id in work_order_ids:
+            item = items.get(work_order_id)
+            if item is None:
+                results.append({'work_order_id': work_order_id, 'requestId': None, 'status': 'NOT_FOUND'})
+            else:
+                results.append({'work_order_id': work_order_id, 'requestId': item['requestId'], 'status': item['status']})
+        return build_response(202, {'requests': results}, event)
+
+    except Exception as e:
+        logger.error(f"Lambda batch handler error: {str(e)}")
+        return {'statusCode': 500, 'body': "error in processing request"}
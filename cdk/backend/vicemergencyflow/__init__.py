@@ -25,6 +25,7 @@ class VicEmergencyStack(Construct):
         scope: Construct,
         construct_id: str,
         api_gateway: core.CoreApiGateway,
+        shared_layer: lambda_.ILayerVersion,
         dynamo_db_workorder_table=str,
     ) -> None:
         super().__init__(scope, construct_id)
@@ -52,10 +53,12 @@ class VicEmergencyStack(Construct):
             runtime=lambda_.Runtime.PYTHON_3_13,
             timeout=Duration.seconds(90),
             memory_size=512,
+            layers=[shared_layer],
             environment={
                 "LOG_LEVEL": "DEBUG",
                 "POWERTOOLS_SERVICE_NAME": "EmergencyCheckFlow",
                 "work_order_table_name": dynamo_db_workorder_table,
+                "MAX_FEED_STALENESS_SECONDS": "900",
             },
         )
 
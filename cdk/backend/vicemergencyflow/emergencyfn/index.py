@@ -1,19 +1,84 @@
+import hashlib
 import json
+import os
+import time
 import urllib3
 import math
 
+from api_response import build_response, compute_etag, etag_matches, not_modified, parse_json_body
+
+FEED_URL = 'https://emergency.vic.gov.au/public/events-geojson.json'
+# Through upstream errors the cached feed is served for at most this long after it was last confirmed
+MAX_FEED_STALENESS_SECONDS = int(os.getenv('MAX_FEED_STALENESS_SECONDS', '900'))
+
+http = urllib3.PoolManager()
+
+# Last feed downloaded by this container, revalidated against the upstream validators on every call
+feed_cache = {'hash': None, 'data': None, 'etag': None, 'last_modified': None, 'fetched_at': None}
+
+
+class FeedUnavailableError(Exception):
+    pass
+
+
+def get_feed():
+    """
+    Return (feed hash, parsed GeoJSON, staleness in seconds), re-downloading the feed only when
+    upstream reports a change. Staleness is 0 unless upstream failed and the cached copy is served.
+    """
+    headers = {}
+    if feed_cache['hash'] is not None:
+        if feed_cache['etag']:
+            headers['If-None-Match'] = feed_cache['etag']
+        if feed_cache['last_modified']:
+            headers['If-Modified-Since'] = feed_cache['last_modified']
+
+    response = http.request('GET', FEED_URL, headers=headers)
+    now = time.time()
+    if response.status == 304 and feed_cache['hash'] is not None:
+        feed_cache['fetched_at'] = now
+        return feed_cache['hash'], feed_cache['data'], 0
+    if response.status != 200:
+        # Bridge short upstream errors with the last good feed, but never serve it indefinitely
+        if feed_cache['hash'] is not None:
+            staleness = int(now - feed_cache['fetched_at'])
+            if staleness <= MAX_FEED_STALENESS_SECONDS:
+                print(f"Emergency feed returned HTTP {response.status}, serving the cached copy ({staleness}s old)")
+                return feed_cache['hash'], feed_cache['data'], staleness
+        raise FeedUnavailableError(f"Emergency feed returned HTTP {response.status}")
+
+    feed_cache.update(
+        hash=hashlib.sha256(response.data).hexdigest(),
+        data=json.loads(response.data.decode('utf-8')),
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+        fetched_at=now,
+    )
+    return feed_cache['hash'], feed_cache['data'], 0
+
+
 def lambda_handler(event, context):
-    event_body = json.loads(event["body"])
+    event_body = parse_json_body(event)
     # Parse the input coordinates and convert to float
     lat = float(event_body['latitude'])
     lon = float(event_body['longitude'])
     search_point = (lon, lat)
 
-    # Download the GeoJSON data
-    http = urllib3.PoolManager()
-    response = http.request('GET', 'https://emergency.vic.gov.au/public/events-geojson.json')
-    geojson_data = json.loads(response.data.decode('utf-8'))
-    
+    # Download the GeoJSON data, or reuse this container's copy when upstream hasn't changed
+    try:
+        feed_hash, geojson_data, staleness = get_feed()
+    except FeedUnavailableError as e:
+        return build_response(502, {'error': str(e)}, event)
+
+    # The result only depends on the feed and the search point. A stale copy gets its own ETag, so a
+    # client holding the fresh one is sent the data with the staleness header instead of a 304.
+    etag = compute_etag(feed_hash, lat, lon, staleness > 0)
+    if etag_matches(event, etag):
+        return not_modified(etag)
+    headers = {'ETag': etag}
+    if staleness:
+        headers.update({'X-Feed-Staleness': str(staleness), 'Access-Control-Expose-Headers': 'ETag, X-Feed-Staleness'})
+
     relevant_incidents = []
     
     for feature in geojson_data['features']:
@@ -28,15 +93,7 @@ def lambda_handler(event, context):
             if is_relevant(geometry, search_point):
                 relevant_incidents.append(feature)
     print(relevant_incidents)
-    return {
-        'statusCode': 200,
-        "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Credentials": "true"
-            },
-        'body': json.dumps(relevant_incidents)
-    }
+    return build_response(200, relevant_incidents, event, headers=headers)
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371  # Earth's radius in kilometers
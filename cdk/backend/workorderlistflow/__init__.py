@@ -1,6 +1,7 @@
 import os
 
 from aws_cdk import (
+    BundlingOptions,
     Stack,
     aws_iam as iam,
     aws_lambda as lambda_,
@@ -10,6 +11,8 @@ from aws_cdk import (
     Duration,
     RemovalPolicy,
     aws_logs as logs,
+    aws_secretsmanager as secretsmanager,
+    aws_dynamodb as dynamodb,
 )
 from constructs import Construct
 
@@ -18,6 +21,9 @@ import core_constructs as core
 
 from cdk_nag import NagSuppressions, NagPackSuppression
 
+# Lambda Web Adapter, used to stream the export response from the Python runtime
+LAMBDA_WEB_ADAPTER_LAYER_VERSION = 25
+
 class WorkOrderApiStack(Construct):
 
     def __init__(
@@ -27,6 +33,11 @@ class WorkOrderApiStack(Construct):
         api_gateway: core.CoreApiGateway,
         dynamo_db_workorder_table: str,
         dynamo_db_location_table: str,
+        locations_version_parameter_name: str,
+        work_order_view_table: dynamodb.Table,
+        shared_layer: lambda_.ILayerVersion,
+        view_shards: int,
+        export_invoker_role: iam.IRole = None,
     ) -> None:
         super().__init__(scope, construct_id)
 
@@ -42,6 +53,28 @@ class WorkOrderApiStack(Construct):
             removal_policy=RemovalPolicy.DESTROY
         )
         
+        # Secret used to sign the continuation tokens handed out by the paginated list mode
+        pagination_secret = secretsmanager.Secret(
+            self,
+            "PaginationTokenSecret",
+            description="HMAC key for work order list continuation tokens",
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                password_length=64,
+                exclude_punctuation=True,
+            ),
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            pagination_secret,
+            [
+                NagPackSuppression(
+                    id="AwsSolutions-SMG4",
+                    reason="Rotating the token signing key only invalidates in-flight continuation tokens; rotation is not required for this demo.",
+                )
+            ],
+        )
+
         # a lambda function process the customer's question
         work_order_fn = lambda_python.PythonFunction(
             self,
@@ -53,14 +86,42 @@ class WorkOrderApiStack(Construct):
             runtime=lambda_.Runtime.PYTHON_3_13,
             timeout=Duration.seconds(90),
             memory_size=512,
+            layers=[shared_layer],
             environment={
                 "LOG_LEVEL": "DEBUG",
                 "POWERTOOLS_SERVICE_NAME": "WorkOrdersService",
                 "WorkOrderTableName": dynamo_db_workorder_table,
                 "LocationTableName": dynamo_db_location_table,
+                "WorkOrderViewTableName": work_order_view_table.table_name,
+                "VIEW_SHARDS": str(view_shards),
+                "ViewVersionCoalesceSeconds": "5",
+                "PaginationSecretArn": pagination_secret.secret_arn,
+                "DefaultPageSize": "50",
+                "MaxPageSize": "500",
+                "ScanSegments": "4",
+                "MaxScanSegments": "16",
+                "ScheduleIndexName": "ScheduleDayIndex",
+                "WindowHours": "24",
+                "UpdatedIndexName": "UpdatedDayIndex",
+                "OwnerIndexName": "OwnerIndex",
+                "LocationIndexName": "LocationIndex",
+                "MaxLocations": "25",
+                "MaxQueryWorkers": "16",
+                "GeohashIndexName": "GeohashIndex",
+                "MaxSearchCells": "32",
+                "MaxSearchLocations": "200",
+                "OwnerClaim": "name",
+                "MaxDeltaDays": "7",
+                "MaxDeltaItems": "1000",
+                "LOCATIONS_VERSION_PARAMETER_NAME": locations_version_parameter_name,
+                "LOCATION_CACHE_TTL_SECONDS": "300",
+                "LOCATION_CACHE_MAX_SIZE": "1000",
             },
         )
 
+        pagination_secret.grant_read(work_order_fn)
+        work_order_view_table.grant_read_data(work_order_fn)
+
 
         work_order_fn_policy = iam.Policy(self, "WorkOrdersFnPolicy")
 
@@ -76,6 +137,14 @@ class WorkOrderApiStack(Construct):
                 ],
                 resources=["*"],
             ),
+            iam.PolicyStatement(
+                sid="LocationsVersionRead",
+                effect=iam.Effect.ALLOW,
+                actions=["ssm:GetParameter"],
+                resources=[
+                    f"arn:{Stack.of(self).partition}:ssm:{Stack.of(self).region}:{Stack.of(self).account}:parameter{locations_version_parameter_name}"
+                ],
+            ),
             iam.PolicyStatement(
                 effect=iam.Effect.ALLOW,
                 actions=[
@@ -109,6 +178,95 @@ class WorkOrderApiStack(Construct):
             request_validator=api_gateway.request_body_validator,
         )
 
+        # Streaming NDJSON export for large tables, served through a function URL
+        export_function_name = f"{construct_id.lower()}-export-workorders"
+
+        export_log_group = logs.LogGroup(
+            self,
+            "WorkOrderExportLogGroup",
+            log_group_name=f"/aws/lambda/{export_function_name}",
+            retention=logs.RetentionDays.ONE_WEEK,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        web_adapter_layer = lambda_.LayerVersion.from_layer_version_arn(
+            self,
+            "LambdaWebAdapterLayer",
+            f"arn:{Stack.of(self).partition}:lambda:{Stack.of(self).region}:753240598075:layer:LambdaAdapterLayerX86:{LAMBDA_WEB_ADAPTER_LAYER_VERSION}",
+        )
+
+        export_fn = lambda_.Function(
+            self,
+            "Export WorkOrders",
+            function_name=export_function_name,
+            code=lambda_.Code.from_asset(
+                f"{os.path.dirname(os.path.realpath(__file__))}/workorders",
+                bundling=BundlingOptions(
+                    image=lambda_.Runtime.PYTHON_3_13.bundling_image,
+                    command=[
+                        "bash", "-c",
+                        "pip install -r requirements.txt -t /asset-output && cp -au . /asset-output",
+                    ],
+                ),
+            ),
+            handler="run.sh",
+            runtime=lambda_.Runtime.PYTHON_3_13,
+            architecture=lambda_.Architecture.X86_64,
+            timeout=Duration.seconds(300),
+            memory_size=512,
+            layers=[shared_layer, web_adapter_layer],
+            environment={
+                "LOG_LEVEL": "INFO",
+                "POWERTOOLS_SERVICE_NAME": "WorkOrdersService",
+                "WorkOrderViewTableName": work_order_view_table.table_name,
+                "VIEW_SHARDS": str(view_shards),
+                "ExportPageSize": "500",
+                "AWS_LAMBDA_EXEC_WRAPPER": "/opt/bootstrap",
+                "AWS_LWA_INVOKE_MODE": "response_stream",
+                "AWS_LWA_READINESS_CHECK_PATH": "/healthz",
+                "PORT": "8080",
+            },
+        )
+
+        work_order_view_table.grant_read_data(export_fn)
+
+        export_fn_url = export_fn.add_function_url(
+            auth_type=lambda_.FunctionUrlAuthType.AWS_IAM,
+            invoke_mode=lambda_.InvokeMode.RESPONSE_STREAM,
+            cors=lambda_.FunctionUrlCorsOptions(
+                allowed_origins=["*"],
+                allowed_methods=[lambda_.HttpMethod.GET, lambda_.HttpMethod.POST],
+                allowed_headers=["*"],
+            ),
+        )
+        if export_invoker_role is not None:
+            export_fn_url.grant_invoke_url(export_invoker_role)
+        self.export_url = export_fn_url.url
+
+        NagSuppressions.add_resource_suppressions(
+            export_fn,
+            [
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": """Certain policies will implement wildcard permissions to expedite development. 
+            TODO: Replace on Production environment (Path to Production)""",
+                },
+                {
+                    "id": "AwsSolutions-IAM4",
+                    "reason": """Prototype will use managed policies to expedite development. 
+                        TODO: Replace on Production environment (Path to Production)""",
+                    "appliesTo": [
+                        "Policy::arn:<AWS::Partition>:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-L1",
+                    "reason": """Policy managed by AWS can not specify a different runtime version""",
+                },
+            ],
+            True,
+        )
+
         NagSuppressions.add_resource_suppressions(
             work_order_fn,
             [
@@ -0,0 +1,132 @@
+"""
+Streaming NDJSON export of the work order list for the supervisor dashboard.
+
+The Python runtime can't stream a Lambda response itself, so this runs as a small HTTP server
+behind the Lambda Web Adapter (see run.sh) with the function URL in RESPONSE_STREAM mode. Work
+orders are read from the view table one Query page at a time and each page is written out as
+newline-delimited JSON before the next one is read, so memory stays flat however large the
+table grows and the first lines reach the client after a single page read.
+"""
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+from boto3.dynamodb.conditions import Key
+from aws_lambda_powertools import Logger
+
+from api_response import dumps
+from fieldsets import InvalidFieldsError, parse_fields, projection_kwargs, trim_fields
+from viewkeys import view_collections
+
+WorkOrderViewTableName = os.getenv("WorkOrderViewTableName")
+work_order_view_table = boto3.resource('dynamodb').Table(WorkOrderViewTableName)
+
+# Items read per Query page, i.e. per chunk written to the stream
+EXPORT_PAGE_SIZE = int(os.getenv("ExportPageSize", "500"))
+
+# The Lambda Web Adapter forwards invocations to this port and polls the readiness path
+PORT = int(os.getenv("PORT", "8080"))
+READINESS_PATH = os.getenv("AWS_LWA_READINESS_CHECK_PATH", "/healthz")
+
+POWERTOOLS_SERVICE_NAME = os.getenv("POWERTOOLS_SERVICE_NAME")
+logger = Logger(service=POWERTOOLS_SERVICE_NAME)
+
+
+def iter_work_order_pages(fields):
+    """
+    Yield pages of live work orders from the view table, one shard collection after the other,
+    each ordered by work_order_id.
+    """
+    for collection in view_collections():
+        query_kwargs = {
+            'KeyConditionExpression': Key('collection').eq(collection),
+            'Limit': EXPORT_PAGE_SIZE,
+            **projection_kwargs(fields),
+        }
+        while True:
+            response = work_order_view_table.query(**query_kwargs)
+            work_orders = []
+            for item in response.get('Items', []):
+                if 'deletedAt' in item:
+                    continue
+                item.pop('collection', None)
+                work_orders.append(item)
+            yield trim_fields(work_orders, fields)
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+
+class ExportHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the body can be sent with chunked transfer encoding
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == READINESS_PATH:
+            self.send_json(200, {"status": "ok"})
+            return
+        fields = parse_qs(url.query).get("fields", [None])[0]
+        self.export(fields)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": "Request body must be a JSON object"})
+            return
+        if not isinstance(request, dict):
+            self.send_json(400, {"error": "Request body must be a JSON object"})
+            return
+        self.export(request.get("fields"))
+
+    def export(self, fields_value):
+        try:
+            fields = parse_fields(fields_value)
+        except InvalidFieldsError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        exported = 0
+        try:
+            for work_orders in iter_work_order_pages(fields):
+                if work_orders:
+                    self.write_chunk(b"".join(dumps(order) + b"\n" for order in work_orders))
+                    exported += len(work_orders)
+        except Exception as e:
+            # The status line is long gone; a trailing error line tells the client the export is partial
+            logger.exception("Work order export failed")
+            self.write_chunk(dumps({"error": str(e)}) + b"\n")
+        finally:
+            self.write_chunk(b"")
+            logger.info(f"Exported {exported} work orders")
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def send_json(self, status_code, body):
+        payload = dumps(body)
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+if __name__ == "__main__":
+    ThreadingHTTPServer(("127.0.0.1", PORT), ExportHandler).serve_forever()
@@ -0,0 +1,86 @@
+"""
+Sparse fieldsets for the work order list. Requested fields are turned into a DynamoDB
+ProjectionExpression so unrequested attributes, in particular the safety check report bodies,
+are never read or shipped.
+"""
+
+WORK_ORDER_FIELDS = frozenset({
+    'work_order_id',
+    'description',
+    'location_name',
+    'asset_id',
+    'status',
+    'scheduled_start_timestamp',
+    'scheduled_finish_timestamp',
+    'owner_name',
+    'priority',
+    'updatedAt',
+    'safetyCheckPerformedAt',
+    'safetycheckresponse',
+    'location_details',
+    'latest_safety_check',
+})
+
+# Report bodies are tens of KB per row; they are fetched per order with the "report" mode instead
+REPORT_FIELDS = frozenset({'safetycheckresponse'})
+DEFAULT_FIELDS = WORK_ORDER_FIELDS - REPORT_FIELDS
+
+# Always read: the key, the soft-delete marker and the location join key
+REQUIRED_FIELDS = frozenset({'work_order_id', 'deletedAt', 'location_name'})
+
+# location_details is joined in from the locations table when not stored on the item
+JOINED_FIELDS = frozenset({'location_details'})
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when `fields` names attributes that aren't part of a work order."""
+
+
+def parse_fields(value):
+    """
+    Resolve the `fields` request value: omitted for the lean default, "*" for every attribute,
+    otherwise a list or comma-separated string of field names. Returns None for every attribute.
+    """
+    if value is None:
+        return DEFAULT_FIELDS
+    if value == "*":
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        raise InvalidFieldsError("fields must be a list or a comma-separated string")
+
+    fields = {str(field).strip() for field in value if str(field).strip()}
+    unknown = fields - WORK_ORDER_FIELDS
+    if unknown:
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return frozenset(fields)
+
+
+def projection_kwargs(fields):
+    """
+    Scan/Query/GetItem keyword arguments projecting `fields` (plus REQUIRED_FIELDS).
+    Placeholders use a #f prefix so they don't collide with the ones boto3 generates for
+    KeyConditionExpression.
+    """
+    if fields is None:
+        return {}
+    names = sorted(fields | REQUIRED_FIELDS)
+    return {
+        'ProjectionExpression': ", ".join(f"#f{index}" for index in range(len(names))),
+        'ExpressionAttributeNames': {f"#f{index}": name for index, name in enumerate(names)},
+    }
+
+
+def wants(fields, field):
+    return fields is None or field in fields
+
+
+def trim_fields(items, fields):
+    """Drop the attributes that were only read because they are required."""
+    if fields is None:
+        return items
+    for item in items:
+        for name in REQUIRED_FIELDS - fields:
+            item.pop(name, None)
+    return items
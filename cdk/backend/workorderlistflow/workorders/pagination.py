@@ -0,0 +1,67 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+
+from aws_lambda_powertools.utilities import parameters
+
+
+PaginationSecretArn = os.getenv("PaginationSecretArn")
+
+# Cache the signing secret for the lifetime of a warm container
+SECRET_MAX_AGE_SECONDS = 3600
+
+
+class InvalidNextTokenError(Exception):
+    """Raised when a continuation token is malformed, tampered with or used with another mode."""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(message):
+    secret = parameters.get_secret(PaginationSecretArn, max_age=SECRET_MAX_AGE_SECONDS)
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).digest()
+
+
+def encode_next_token(mode, last_evaluated_key):
+    """
+    Wrap a DynamoDB LastEvaluatedKey into an opaque, signed continuation token.
+    The token is bound to the list mode it was issued for so it can't be replayed against another query.
+    """
+    if not last_evaluated_key:
+        return None
+
+    message = json.dumps(
+        {"mode": mode, "key": last_evaluated_key},
+        separators=(",", ":"),
+        sort_keys=True,
+    ).encode("utf-8")
+    return f"{_b64encode(message)}.{_b64encode(_sign(message))}"
+
+
+def decode_next_token(token, mode):
+    """
+    Verify a continuation token and return the ExclusiveStartKey it wraps.
+    """
+    try:
+        encoded_message, encoded_signature = token.split(".", 1)
+        message = _b64decode(encoded_message)
+        signature = _b64decode(encoded_signature)
+    except (AttributeError, ValueError) as e:
+        raise InvalidNextTokenError("Malformed nextToken") from e
+
+    if not hmac.compare_digest(signature, _sign(message)):
+        raise InvalidNextTokenError("Invalid nextToken signature")
+
+    payload = json.loads(message)
+    if payload.get("mode") != mode:
+        raise InvalidNextTokenError(f"nextToken was not issued for mode '{mode}'")
+
+    return payload["key"]
@@ -0,0 +1,73 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# How long a blocked worker waits before re-checking whether the consumer went away
+_PUT_POLL_SECONDS = 0.1
+
+_SEGMENT_DONE = object()
+
+
+class _SegmentFailed:
+    def __init__(self, segment, error):
+        self.segment = segment
+        self.error = error
+
+
+def _offer(pages, item, stop):
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=_PUT_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _scan_segment(table, segment, total_segments, scan_kwargs, pages, stop):
+    try:
+        segment_kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+        while not stop.is_set():
+            response = table.scan(**segment_kwargs)
+            if not _offer(pages, response.get('Items', []), stop):
+                return
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+            segment_kwargs['ExclusiveStartKey'] = last_evaluated_key
+        _offer(pages, _SEGMENT_DONE, stop)
+    except Exception as e:
+        _offer(pages, _SegmentFailed(segment, e), stop)
+
+
+def parallel_scan(table, total_segments, max_buffered_pages=None, **scan_kwargs):
+    """
+    Scan a DynamoDB table with `total_segments` Segment/TotalSegments workers and yield items as
+    the pages arrive. At most `max_buffered_pages` pages are held between the workers and the
+    consumer, so memory stays bounded by the page size rather than the table size; workers block
+    until the consumer catches up. Closing the generator early stops the remaining workers.
+
+    Table.scan is a thin wrapper over the service client, which is safe to share between threads.
+    """
+    if total_segments < 1:
+        raise ValueError("total_segments must be at least 1")
+
+    pages = queue.Queue(maxsize=max_buffered_pages or total_segments * 2)
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=total_segments, thread_name_prefix="scan-segment")
+    try:
+        for segment in range(total_segments):
+            executor.submit(_scan_segment, table, segment, total_segments, scan_kwargs, pages, stop)
+
+        remaining = total_segments
+        while remaining:
+            page = pages.get()
+            if page is _SEGMENT_DONE:
+                remaining -= 1
+            elif isinstance(page, _SegmentFailed):
+                raise RuntimeError(f"Scan of segment {page.segment} failed") from page.error
+            else:
+                yield from page
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
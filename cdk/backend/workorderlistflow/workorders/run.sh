@@ -0,0 +1,5 @@
+#!/bin/bash
+
+# Started by the Lambda Web Adapter (AWS_LAMBDA_EXEC_WRAPPER=/opt/bootstrap), which streams the
+# HTTP response of this server back through the function URL
+PYTHONPATH=$PYTHONPATH:/opt/python:$LAMBDA_RUNTIME_DIR exec python export.py
@@ -1,10 +1,21 @@
 import boto3
 import json
+import math
 import os
-from datetime import datetime, timezone
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from boto3.dynamodb.conditions import Key
 from aws_lambda_powertools import Logger, Tracer, Metrics
 from aws_lambda_powertools.metrics import MetricUnit
 
+from pagination import InvalidNextTokenError, encode_next_token, decode_next_token
+from viewkeys import VIEW_COLLECTION_PREFIX, VIEW_VERSION_KEY, view_collections
+from parallel_scan import parallel_scan
+from location_cache import LocationCache
+from api_response import build_response, compute_etag, etag_matches, not_modified, parse_json_body
+import geohash
+from fieldsets import InvalidFieldsError, parse_fields, projection_kwargs, trim_fields, wants
 
 
 # Initialize DynamoDB client
@@ -13,6 +24,52 @@ WorkOrderTableName = os.getenv("WorkOrderTableName")
 LocationTableName = os.getenv("LocationTableName")
 work_orders_table = dynamodb.Table(WorkOrderTableName)
 locations_table = dynamodb.Table(LocationTableName)
+WorkOrderViewTableName = os.getenv("WorkOrderViewTableName")
+work_order_view_table = dynamodb.Table(WorkOrderViewTableName)
+ScheduleIndexName = os.getenv("ScheduleIndexName", "ScheduleDayIndex")
+UpdatedIndexName = os.getenv("UpdatedIndexName", "UpdatedDayIndex")
+OwnerIndexName = os.getenv("OwnerIndexName", "OwnerIndex")
+LocationIndexName = os.getenv("LocationIndexName", "LocationIndex")
+GeohashIndexName = os.getenv("GeohashIndexName", "GeohashIndex")
+# Cognito claim holding the technician's owner_name, as written in the work orders
+OwnerClaim = os.getenv("OwnerClaim", "name")
+
+# Same format the data import writes scheduled_start_timestamp in, so comparisons are lexicographic
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# BatchGetItem accepts at most 100 keys per call; unprocessed keys are retried with backoff
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 5
+BATCH_GET_BASE_DELAY_SECONDS = 0.05
+
+# Page size bounds for the paginated list mode
+DEFAULT_PAGE_SIZE = int(os.getenv("DefaultPageSize", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MaxPageSize", "500"))
+
+# Number of parallel Segment/TotalSegments workers used when reading the whole table
+DEFAULT_SCAN_SEGMENTS = int(os.getenv("ScanSegments", "4"))
+MAX_SCAN_SEGMENTS = int(os.getenv("MaxScanSegments", "16"))
+
+# Length of the upcoming-work window returned by the window mode
+DEFAULT_WINDOW_HOURS = int(os.getenv("WindowHours", "24"))
+MAX_WINDOW_HOURS = int(os.getenv("MaxWindowHours", str(24 * 14)))
+
+# Most locations the location mode queries (in parallel) in one request
+MAX_LOCATIONS = int(os.getenv("MaxLocations", "25"))
+# Concurrent GSI queries per request
+MAX_QUERY_WORKERS = int(os.getenv("MaxQueryWorkers", "16"))
+
+# Spatial search: geohash cells queried per area, and locations an area may match
+MAX_SEARCH_CELLS = int(os.getenv("MaxSearchCells", "32"))
+MAX_SEARCH_LOCATIONS = int(os.getenv("MaxSearchLocations", "200"))
+
+# Delta sync: how far back a watermark may be, and how many changes, before a full resync is returned
+MAX_DELTA_DAYS = int(os.getenv("MaxDeltaDays", "7"))
+MAX_DELTA_ITEMS = int(os.getenv("MaxDeltaItems", "1000"))
+# Watermarks trail the read by this much so writes still propagating to the GSI are picked up next time
+WATERMARK_LAG_SECONDS = int(os.getenv("WatermarkLagSeconds", "5"))
+# The view sync bumps the change counter at most this often per instance (see viewsync)
+VIEW_VERSION_COALESCE_SECONDS = float(os.getenv("ViewVersionCoalesceSeconds", "5"))
 
 
 # Initialize Powertools utilities
@@ -22,6 +79,643 @@ tracer = Tracer(service=POWERTOOLS_SERVICE_NAME)
 metrics = Metrics(namespace="WorkOrderNamespace")
 
 
+class BadRequestError(Exception):
+    """Raised when the list request body can't be honoured."""
+
+
+class NotFoundError(Exception):
+    """Raised when a requested work order doesn't exist."""
+
+
+class ForbiddenError(Exception):
+    """Raised when the caller's identity doesn't allow the request."""
+
+
+def parse_request_body(event):
+    try:
+        request = parse_json_body(event)
+    except ValueError as e:
+        raise BadRequestError("Request body must be valid JSON") from e
+    if not isinstance(request, dict):
+        raise BadRequestError("Request body must be a JSON object")
+    return request
+
+
+def parse_page_size(request):
+    page_size = request.get("pageSize", DEFAULT_PAGE_SIZE)
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError) as e:
+        raise BadRequestError("pageSize must be an integer") from e
+    if page_size < 1:
+        raise BadRequestError("pageSize must be greater than zero")
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def parse_scan_segments(request):
+    segments = request.get("segments", DEFAULT_SCAN_SEGMENTS)
+    try:
+        segments = int(segments)
+    except (TypeError, ValueError) as e:
+        raise BadRequestError("segments must be an integer") from e
+    if segments < 1:
+        raise BadRequestError("segments must be greater than zero")
+    return min(segments, MAX_SCAN_SEGMENTS)
+
+
+def parse_timestamp(request, field, default):
+    value = request.get(field)
+    if value is None:
+        return default
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError as e:
+        raise BadRequestError(f"{field} must be an ISO 8601 timestamp") from e
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_window(request, now):
+    """
+    Resolve the [windowStart, windowEnd] range of the window mode. Defaults to the next
+    WindowHours hours starting now.
+    """
+    window_start = parse_timestamp(request, "windowStart", now)
+    window_hours = request.get("windowHours", DEFAULT_WINDOW_HOURS)
+    try:
+        window_hours = int(window_hours)
+    except (TypeError, ValueError) as e:
+        raise BadRequestError("windowHours must be an integer") from e
+    window_end = parse_timestamp(request, "windowEnd", window_start + timedelta(hours=window_hours))
+
+    if window_end < window_start:
+        raise BadRequestError("windowEnd must not be before windowStart")
+    if window_end - window_start > timedelta(hours=MAX_WINDOW_HOURS):
+        raise BadRequestError(f"The window can't be longer than {MAX_WINDOW_HOURS} hours")
+    return window_start, window_end
+
+
+def parse_locations(request):
+    locations = request.get("locations", request.get("locationName"))
+    if isinstance(locations, str):
+        locations = [locations]
+    if not isinstance(locations, list) or not locations:
+        raise BadRequestError("locations must be a location name or a non-empty list of them")
+    locations = sorted({str(location) for location in locations})
+    if len(locations) > MAX_LOCATIONS:
+        raise BadRequestError(f"At most {MAX_LOCATIONS} locations can be requested at once")
+    return locations
+
+
+def parse_coordinate(request, field, limit):
+    try:
+        value = float(request[field])
+    except KeyError as e:
+        raise BadRequestError(f"{field} is required") from e
+    except (TypeError, ValueError) as e:
+        raise BadRequestError(f"{field} must be a number") from e
+    if not -limit <= value <= limit:
+        raise BadRequestError(f"{field} must be between {-limit} and {limit}")
+    return value
+
+
+def parse_radius(request):
+    latitude = parse_coordinate(request, "latitude", 90)
+    longitude = parse_coordinate(request, "longitude", 180)
+    try:
+        radius_km = float(request.get("radiusKm"))
+    except (TypeError, ValueError) as e:
+        raise BadRequestError("radiusKm must be a number") from e
+    if not math.isfinite(radius_km) or radius_km <= 0:
+        raise BadRequestError("radiusKm must be a positive finite number")
+    return latitude, longitude, radius_km
+
+
+def parse_bbox(request):
+    bbox = (
+        parse_coordinate(request, "minLatitude", 90),
+        parse_coordinate(request, "minLongitude", 180),
+        parse_coordinate(request, "maxLatitude", 90),
+        parse_coordinate(request, "maxLongitude", 180),
+    )
+    if bbox[2] < bbox[0] or bbox[3] < bbox[1]:
+        raise BadRequestError("The box's minimum coordinates must not exceed its maximum ones")
+    return bbox
+
+
+def resolve_owner(event):
+    """
+    The owner_name of the calling technician, taken from the Cognito user pool claims the API
+    Gateway authorizer verified.
+    """
+    claims = ((event.get("requestContext") or {}).get("authorizer") or {}).get("claims") or {}
+    owner_name = claims.get(OwnerClaim)
+    if not owner_name:
+        raise ForbiddenError(f"The signed-in user has no '{OwnerClaim}' claim to list work orders for")
+    return owner_name
+
+
+def day_buckets(window_start, window_end):
+    day = window_start.date()
+    while day <= window_end.date():
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def format_watermark(value):
+    return value.isoformat(timespec='microseconds')
+
+
+def get_view_version():
+    """
+    Return (version, changedAt epoch seconds) of the view table's change counter.
+    """
+    item = work_order_view_table.get_item(Key=VIEW_VERSION_KEY, ConsistentRead=True).get('Item') or {}
+    return int(item.get('version', 0)), float(item.get('changedAt', 0))
+
+
+def compute_list_etag(mode, request, now):
+    """
+    Strong ETag for a list request, or None when the response can't safely be revalidated. The
+    result set only changes when the view sync bumps the change counter, so the ETag covers the
+    counter plus everything in the request (including the page key). Default windows move with
+    the clock, so the resolved window is part of it too.
+
+    A change counted within WATERMARK_LAG_SECONDS may not be visible to the GSI reads yet, so no
+    ETag is handed out until it has settled. The view sync may also fold changes made within
+    VIEW_VERSION_COALESCE_SECONDS of a bump into that bump, so those have to settle as well.
+    """
+    version, changed_at = get_view_version()
+    if time.time() - changed_at < WATERMARK_LAG_SECONDS + VIEW_VERSION_COALESCE_SECONDS:
+        return None
+    window = [format_watermark(bound) for bound in parse_window(request, now)] if mode == "window" else None
+    return compute_etag(version, mode, request, window)
+
+
+def is_paginated(request):
+    return "pageSize" in request or "nextToken" in request
+
+
+def strip_view_keys(item):
+    item.pop('collection', None)
+    return item
+
+
+@tracer.capture_method
+def scan_all_work_orders(total_segments, fields):
+    """
+    Read every pre-joined work order from the view table with a parallel segmented scan, following
+    LastEvaluatedKey past DynamoDB's 1 MB page limit in every segment. The filter leaves out the
+    view's bookkeeping items, such as the change counter.
+    """
+    tracer.put_annotation("ScanSegments", total_segments)
+    scan_kwargs = projection_kwargs(fields)
+    scan_kwargs['FilterExpression'] = 'begins_with(#collection, :collection)'
+    scan_kwargs['ExpressionAttributeNames'] = {**scan_kwargs.get('ExpressionAttributeNames', {}), '#collection': 'collection'}
+    scan_kwargs['ExpressionAttributeValues'] = {':collection': VIEW_COLLECTION_PREFIX}
+    items = parallel_scan(work_order_view_table, total_segments, **scan_kwargs)
+    return [strip_view_keys(item) for item in items]
+
+
+@tracer.capture_method
+def scan_work_orders_page(page_size, fields, next_token=None):
+    """
+    Read a single page of pre-joined work orders from the view table, querying one shard
+    collection at a time, each ordered by work_order_id, so walking the continuation tokens
+    visits every work order exactly once. The token carries the shard being read and its
+    LastEvaluatedKey.
+    """
+    collections = view_collections()
+    shard, exclusive_start_key = 0, None
+    if next_token:
+        cursor = decode_next_token(next_token, mode="page")
+        shard, exclusive_start_key = cursor["shard"], cursor["key"]
+
+    work_orders = []
+    for index in range(shard, len(collections)):
+        query_kwargs = {
+            'KeyConditionExpression': Key('collection').eq(collections[index]),
+            **projection_kwargs(fields),
+        }
+        while True:
+            query_kwargs['Limit'] = page_size - len(work_orders)
+            if exclusive_start_key:
+                query_kwargs['ExclusiveStartKey'] = exclusive_start_key
+            response = work_order_view_table.query(**query_kwargs)
+            work_orders.extend(strip_view_keys(item) for item in response.get('Items', []))
+            exclusive_start_key = response.get('LastEvaluatedKey')
+
+            if len(work_orders) >= page_size:
+                if exclusive_start_key:
+                    cursor_shard = index
+                elif index + 1 < len(collections):
+                    cursor_shard = index + 1
+                else:
+                    return work_orders, None
+                return work_orders, encode_next_token("page", {"shard": cursor_shard, "key": exclusive_start_key})
+            if not exclusive_start_key:
+                break
+
+    return work_orders, None
+
+
+@tracer.capture_method
+def query_window_page(window_start, window_end, page_size, fields, next_token=None):
+    """
+    Read a page of work orders scheduled to start inside the window from the ScheduleDayIndex GSI,
+    querying one schedule_day partition at a time. Items come back ordered by
+    scheduled_start_timestamp. The continuation token carries the window, the day being read and
+    its LastEvaluatedKey.
+    """
+    if next_token:
+        cursor = decode_next_token(next_token, mode="window")
+        window = (cursor["windowStart"], cursor["windowEnd"])
+        day, exclusive_start_key = cursor["day"], cursor["key"]
+    else:
+        window = (window_start.strftime(TIMESTAMP_FORMAT), window_end.strftime(TIMESTAMP_FORMAT))
+        day, exclusive_start_key = window[0][:10], None
+
+    tracer.put_annotation("DynamoDBIndex", ScheduleIndexName)
+    days = [d for d in day_buckets(datetime.fromisoformat(window[0]), datetime.fromisoformat(window[1])) if d >= day]
+    work_orders = []
+    for index, day in enumerate(days):
+        query_kwargs = {
+            'IndexName': ScheduleIndexName,
+            'KeyConditionExpression': Key('schedule_day').eq(day) & Key('scheduled_start_timestamp').between(*window),
+            **projection_kwargs(fields),
+        }
+        while True:
+            query_kwargs['Limit'] = page_size - len(work_orders)
+            if exclusive_start_key:
+                query_kwargs['ExclusiveStartKey'] = exclusive_start_key
+            response = work_orders_table.query(**query_kwargs)
+            work_orders.extend(response.get('Items', []))
+            exclusive_start_key = response.get('LastEvaluatedKey')
+
+            if len(work_orders) >= page_size:
+                if exclusive_start_key:
+                    cursor_day = day
+                elif index + 1 < len(days):
+                    cursor_day = days[index + 1]
+                else:
+                    return work_orders, None
+                cursor = {"windowStart": window[0], "windowEnd": window[1], "day": cursor_day, "key": exclusive_start_key}
+                return work_orders, encode_next_token("window", cursor)
+            if not exclusive_start_key:
+                break
+
+    return work_orders, None
+
+
+@tracer.capture_method
+def query_owner_page(owner_name, window_start, window_end, page_size, fields, next_token=None):
+    """
+    Read a page of the owner's work orders from the OwnerIndex GSI, ordered by
+    scheduled_start_timestamp and optionally limited to a start time range. Tokens are only
+    accepted back from the owner they were issued to.
+    """
+    key_condition = Key('owner_name').eq(owner_name)
+    if window_start and window_end:
+        key_condition &= Key('scheduled_start_timestamp').between(
+            window_start.strftime(TIMESTAMP_FORMAT), window_end.strftime(TIMESTAMP_FORMAT)
+        )
+    elif window_start:
+        key_condition &= Key('scheduled_start_timestamp').gte(window_start.strftime(TIMESTAMP_FORMAT))
+    elif window_end:
+        key_condition &= Key('scheduled_start_timestamp').lte(window_end.strftime(TIMESTAMP_FORMAT))
+
+    tracer.put_annotation("DynamoDBIndex", OwnerIndexName)
+    query_kwargs = {
+        'IndexName': OwnerIndexName,
+        'KeyConditionExpression': key_condition,
+        'Limit': page_size,
+        **projection_kwargs(fields),
+    }
+    if next_token:
+        exclusive_start_key = decode_next_token(next_token, mode="owner")
+        if exclusive_start_key.get('owner_name') != owner_name:
+            raise InvalidNextTokenError("nextToken was issued to a different owner")
+        query_kwargs['ExclusiveStartKey'] = exclusive_start_key
+
+    response = work_orders_table.query(**query_kwargs)
+    return response.get('Items', []), encode_next_token("owner", response.get('LastEvaluatedKey'))
+
+
+def query_location(location_name, fields):
+    query_kwargs = {
+        'IndexName': LocationIndexName,
+        'KeyConditionExpression': Key('location_name').eq(location_name),
+        **projection_kwargs(fields),
+    }
+    work_orders = []
+    while True:
+        response = work_orders_table.query(**query_kwargs)
+        work_orders.extend(response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return work_orders
+        query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+
+@tracer.capture_method
+def query_location_work_orders(location_names, fields):
+    """
+    Read every work order at the given locations from the LocationIndex GSI, one Query per
+    location run in parallel, each followed through its LastEvaluatedKey pages.
+    """
+    tracer.put_annotation("DynamoDBIndex", LocationIndexName)
+    workers = min(len(location_names), MAX_QUERY_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="location-query") as executor:
+        pages = executor.map(lambda location_name: query_location(location_name, fields), location_names)
+        return [work_order for page in pages for work_order in page]
+
+
+def query_geohash_cell(cell):
+    key_condition = Key('geohash_prefix').eq(cell[:geohash.INDEX_PRECISION])
+    if len(cell) > geohash.INDEX_PRECISION:
+        key_condition &= Key('geohash').begins_with(cell)
+    query_kwargs = {'IndexName': GeohashIndexName, 'KeyConditionExpression': key_condition}
+    locations = []
+    while True:
+        response = locations_table.query(**query_kwargs)
+        locations.extend(response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return locations
+        query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+
+@tracer.capture_method
+def find_locations_in_area(bbox, distance_km=None, radius_km=None):
+    """
+    Find the locations inside the bounding box: cover it with geohash cells, query the cells of
+    the GeohashIndex GSI in parallel, then drop the candidates outside the box or, when
+    `distance_km` is given, further than `radius_km` away. Returns {location_name: distance_km or
+    None}.
+    """
+    cells = geohash.cover(*bbox, max_cells=MAX_SEARCH_CELLS)
+    if cells is None:
+        raise BadRequestError("The search area is too large, narrow it down")
+    tracer.put_annotation("GeohashCells", len(cells))
+
+    with ThreadPoolExecutor(max_workers=min(len(cells), MAX_QUERY_WORKERS), thread_name_prefix="geohash-query") as executor:
+        candidates = [location for page in executor.map(query_geohash_cell, cells) for location in page]
+
+    min_latitude, min_longitude, max_latitude, max_longitude = bbox
+    found = {}
+    for location in candidates:
+        latitude, longitude = float(location['latitude']), float(location['longitude'])
+        if not (min_latitude <= latitude <= max_latitude and min_longitude <= longitude <= max_longitude):
+            continue
+        distance = distance_km(latitude, longitude) if distance_km else None
+        if distance is not None and distance > radius_km:
+            continue
+        found[location['location_name']] = distance
+    logger.info(f"{len(found)} of {len(candidates)} candidate locations in the search area")
+
+    if len(found) > MAX_SEARCH_LOCATIONS:
+        raise BadRequestError(f"More than {MAX_SEARCH_LOCATIONS} locations in the search area, narrow it down")
+    return found
+
+
+@tracer.capture_method
+def query_changed_work_orders(since, until, fields):
+    """
+    Read the work orders whose updatedAt is at or after `since` from the UpdatedDayIndex GSI, one
+    updated_day partition at a time. Returns None once more than MAX_DELTA_ITEMS changed, in which
+    case a full resync is cheaper for the client than the delta.
+    """
+    tracer.put_annotation("DynamoDBIndex", UpdatedIndexName)
+    changed = []
+    for day in day_buckets(since, until):
+        query_kwargs = {
+            'IndexName': UpdatedIndexName,
+            'KeyConditionExpression': Key('updated_day').eq(day) & Key('updatedAt').gte(format_watermark(since)),
+            **projection_kwargs(fields),
+        }
+        while True:
+            response = work_orders_table.query(**query_kwargs)
+            changed.extend(response.get('Items', []))
+            if len(changed) > MAX_DELTA_ITEMS:
+                return None
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+    return changed
+
+
+@tracer.capture_method
+def batch_get_locations(location_names):
+    """
+    Fetch location items by location_name with BatchGetItem, 100 keys per call, retrying
+    UnprocessedKeys with exponential backoff.
+    """
+    locations = {}
+    location_names = sorted(location_names)
+    for start in range(0, len(location_names), BATCH_GET_MAX_KEYS):
+        request_items = {
+            LocationTableName: {
+                'Keys': [{'location_name': name} for name in location_names[start:start + BATCH_GET_MAX_KEYS]]
+            }
+        }
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for loc in response.get('Responses', {}).get(LocationTableName, []):
+                locations[loc['location_name']] = loc
+
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+            if attempt == BATCH_GET_MAX_RETRIES:
+                raise RuntimeError(f"Locations still unprocessed after {BATCH_GET_MAX_RETRIES} retries")
+            time.sleep(BATCH_GET_BASE_DELAY_SECONDS * 2 ** attempt)
+    return locations
+
+
+# Kept at module level so warm invocations reuse the cached locations
+location_cache = LocationCache(
+    loader=batch_get_locations,
+    version_parameter_name=os.getenv("LOCATIONS_VERSION_PARAMETER_NAME"),
+    metrics=metrics,
+)
+
+
+@tracer.capture_method
+def attach_location_details(work_orders):
+    tracer.put_annotation("DynamoDBTable", "Locations")
+    location_names = {order['location_name'] for order in work_orders if order.get('location_name')}
+    locations = location_cache.get_many(location_names)
+    logger.info(f"Retrieved {len(locations)} locations")
+
+    # Add location details to each work order
+    for order in work_orders:
+        location_name = order.get('location_name')
+        if location_name in locations:
+            order['location_details'] = locations[location_name]
+        else:
+            order['location_details'] = None  # Handle missing location details
+
+    return work_orders
+
+
+REPORT_RESPONSE_FIELDS = frozenset({'work_order_id', 'safetycheckresponse', 'safetyCheckPerformedAt'})
+
+
+@tracer.capture_method
+def get_work_order_report(work_order_id):
+    """
+    Read only the safety check report of one work order, for the details pane.
+    """
+    response = work_orders_table.get_item(
+        Key={'work_order_id': work_order_id},
+        **projection_kwargs(REPORT_RESPONSE_FIELDS),
+    )
+    return response.get('Item')
+
+
+def drop_deleted(work_orders):
+    """Soft-deleted work orders (deletedAt set) are only surfaced by the delta mode."""
+    return [order for order in work_orders if 'deletedAt' not in order]
+
+
+def sort_by_work_order_id(work_orders):
+    return sorted(work_orders, key=lambda x: x.get('work_order_id', ''))
+
+
+def prepare_work_orders(work_orders, fields, join_locations):
+    """
+    Drop soft-deleted orders, join location_details when requested and not already stored on the
+    items, then trim the attributes that were only read for those steps.
+    """
+    work_orders = drop_deleted(work_orders)
+    logger.info(f"Retrieved {len(work_orders)} work orders")
+    if join_locations and wants(fields, 'location_details'):
+        attach_location_details(work_orders)
+    return trim_fields(work_orders, fields)
+
+
+def list_all(request, now):
+    # View items already carry location_details, no join needed
+    fields = parse_fields(request.get("fields"))
+    work_orders = scan_all_work_orders(parse_scan_segments(request), fields)
+    return sort_by_work_order_id(prepare_work_orders(work_orders, fields, join_locations=False))
+
+
+def list_page(request, now):
+    # View items already carry location_details and come back ordered by work_order_id per shard
+    fields = parse_fields(request.get("fields"))
+    work_orders, next_token = scan_work_orders_page(parse_page_size(request), fields, request.get("nextToken"))
+    return {"items": prepare_work_orders(work_orders, fields, join_locations=False), "nextToken": next_token}
+
+
+def list_window(request, now):
+    fields = parse_fields(request.get("fields"))
+    window_start, window_end = parse_window(request, now)
+    work_orders, next_token = query_window_page(
+        window_start, window_end, parse_page_size(request), fields, request.get("nextToken")
+    )
+    # Already ordered by scheduled_start_timestamp
+    return {"items": prepare_work_orders(work_orders, fields, join_locations=True), "nextToken": next_token}
+
+
+def list_owner(request, now):
+    fields = parse_fields(request.get("fields"))
+    window_start = parse_timestamp(request, "windowStart", None)
+    window_end = parse_timestamp(request, "windowEnd", None)
+    if window_start and window_end and window_end < window_start:
+        raise BadRequestError("windowEnd must not be before windowStart")
+    work_orders, next_token = query_owner_page(
+        request["ownerName"], window_start, window_end, parse_page_size(request), fields, request.get("nextToken")
+    )
+    # Already ordered by scheduled_start_timestamp
+    return {"items": prepare_work_orders(work_orders, fields, join_locations=True), "nextToken": next_token}
+
+
+def list_location(request, now):
+    fields = parse_fields(request.get("fields"))
+    work_orders = query_location_work_orders(parse_locations(request), fields)
+    return {"items": sort_by_work_order_id(prepare_work_orders(work_orders, fields, join_locations=True))}
+
+
+def query_area_work_orders(locations, fields):
+    return query_location_work_orders(sorted(locations), fields) if locations else []
+
+
+def list_radius(request, now):
+    fields = parse_fields(request.get("fields"))
+    latitude, longitude, radius_km = parse_radius(request)
+    locations = find_locations_in_area(
+        geohash.radius_bbox(latitude, longitude, radius_km),
+        distance_km=lambda lat, lon: geohash.haversine_km(latitude, longitude, lat, lon),
+        radius_km=radius_km,
+    )
+    work_orders = query_area_work_orders(locations, fields)
+    for work_order in work_orders:
+        work_order['distance_km'] = round(locations[work_order['location_name']], 3)
+    work_orders = prepare_work_orders(work_orders, fields, join_locations=True)
+    # Nearest first
+    work_orders.sort(key=lambda x: (x['distance_km'], x.get('work_order_id', '')))
+    return {"items": work_orders}
+
+
+def list_bbox(request, now):
+    fields = parse_fields(request.get("fields"))
+    locations = find_locations_in_area(parse_bbox(request))
+    work_orders = query_area_work_orders(locations, fields)
+    return {"items": sort_by_work_order_id(prepare_work_orders(work_orders, fields, join_locations=True))}
+
+
+def list_delta(request, now):
+    """
+    Return the work orders changed since the `since` watermark, the ids of those deleted since,
+    and the watermark to send next time. A missing, too old or too busy watermark gets every
+    work order back with fullResync set, and the client replaces its copy.
+    """
+    fields = parse_fields(request.get("fields"))
+    watermark = now - timedelta(seconds=WATERMARK_LAG_SECONDS)
+    since = parse_timestamp(request, "since", None)
+
+    changed = None
+    if since is not None and now - since <= timedelta(days=MAX_DELTA_DAYS):
+        changed = query_changed_work_orders(since, now, fields)
+
+    if changed is None:
+        logger.info("Delta sync falling back to a full resync")
+        items = list_all(request, now)
+        return {"items": items, "deleted": [], "watermark": format_watermark(watermark), "fullResync": True}
+
+    deleted = sorted(order['work_order_id'] for order in changed if 'deletedAt' in order)
+    logger.info(f"{len(deleted)} work orders deleted since {format_watermark(since)}")
+    return {
+        "items": sort_by_work_order_id(prepare_work_orders(changed, fields, join_locations=True)),
+        "deleted": deleted,
+        "watermark": format_watermark(watermark),
+        "fullResync": False,
+    }
+
+
+def get_report(request, now):
+    work_order_id = request.get("workOrderId")
+    if not work_order_id:
+        raise BadRequestError("workOrderId is required")
+    report = get_work_order_report(work_order_id)
+    if report is None or 'deletedAt' in report:
+        raise NotFoundError(f"Work order {work_order_id} not found")
+    return trim_fields([report], REPORT_RESPONSE_FIELDS)[0]
+
+
+LIST_MODES = {
+    "window": list_window,
+    "owner": list_owner,
+    "location": list_location,
+    "radius": list_radius,
+    "bbox": list_bbox,
+    "delta": list_delta,
+    "report": get_report,
+}
+
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
@@ -29,59 +723,86 @@ metrics = Metrics(namespace="WorkOrderNamespace")
 def lambda_handler(event, context):
     """
     Lambda function to query work orders and their associated locations from DynamoDB.
+
+    An empty request body returns every work order as a list, read with `segments` parallel scan
+    workers (ScanSegments by default). Supplying `pageSize` and/or `nextToken` returns a single
+    page as {"items": [...], "nextToken": "..."}; pass the returned token back unchanged to read
+    the next page, a null token means the last page was reached.
+
+    {"mode": "window"} returns, in the same paged shape, the work orders scheduled to start between
+    `windowStart` (default now) and `windowEnd` (default `windowHours` later), ordered by start time.
+
+    {"mode": "owner"} returns, in the same paged shape, the signed-in technician's own work orders
+    by start time, optionally between `windowStart` and/or `windowEnd`. The owner comes from the
+    caller's Cognito identity (the OwnerClaim claim), never from the request body.
+
+    {"mode": "location", "locations": [...]} (or a single `locationName`) returns {"items": [...]}
+    with every work order at those locations, read with parallel LocationIndex queries.
+
+    {"mode": "radius", "latitude": .., "longitude": .., "radiusKm": ..} returns {"items": [...]}
+    with the work orders at locations within radiusKm, nearest first with their `distance_km`;
+    {"mode": "bbox", "minLatitude": .., "minLongitude": .., "maxLatitude": .., "maxLongitude": ..}
+    those inside the box. Both search the locations' GeohashIndex.
+
+    {"mode": "delta", "since": "<watermark>"} (or just `since`) returns only the work orders changed
+    since the watermark, see list_delta.
+
+    Every list mode accepts `fields`, a list or comma-separated string of attributes to return, or
+    "*" for all of them. The default leaves out the safety check report bodies, which
+    {"mode": "report", "workOrderId": "..."} returns for a single work order.
+
+    Successful responses carry a strong ETag; send it back in If-None-Match and a 304 with no body
+    is returned while the work orders behind the request are unchanged.
     """
     try:
+        request = parse_request_body(event)
+
         # Define the current timestamp (UTC)
-        current_time = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
-        logger.info(f"Current time: {current_time}")
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        logger.info(f"Current time: {now.strftime(TIMESTAMP_FORMAT)}")
 
-        # Scan work orders table
+        # Read work orders (view table for the full and paged lists, base table GSIs otherwise)
         tracer.put_annotation("DynamoDBTable", "WorkOrders")
-        work_orders_response = work_orders_table.scan()
-        work_orders = work_orders_response.get('Items', [])
-        logger.info(f"Retrieved {len(work_orders)} work orders")
-
-        # Filter work orders based on the current date/time
-       # filtered_work_orders = [
-       #     order for order in work_orders 
-       #     if order['scheduled_start_timestamp'] >= current_time
-       # ]
-       # logger.info(f"Filtered {len(filtered_work_orders)} work orders")
-
-        # Query locations table to fetch location details
-        tracer.put_annotation("DynamoDBTable", "Locations")
-        locations_response = locations_table.scan()
-        locations = {loc['location_name']: loc for loc in locations_response.get('Items', [])}
-        logger.info(f"Retrieved {len(locations)} locations")
-
-        # Add location details to each work order
-        for order in work_orders:
-            location_name = order.get('location_name')
-            if location_name in locations:
-                order['location_details'] = locations[location_name]
-            else:
-                order['location_details'] = None  # Handle missing location details
+        mode = request.get("mode") or ("delta" if "since" in request else None)
+        if mode is None:
+            list_work_orders = list_page if is_paginated(request) else list_all
+        elif mode in LIST_MODES:
+            list_work_orders = LIST_MODES[mode]
+        else:
+            raise BadRequestError(f"Unsupported mode '{mode}'")
+
+        if mode == "owner":
+            # Part of the request from here on, so the ETag is per owner too
+            request = dict(request, ownerName=resolve_owner(event))
+
+        # Revalidate before reading anything else: an unchanged result set isn't rebuilt
+        etag = compute_list_etag(mode, request, now)
+        if etag is not None and etag_matches(event, etag):
+            metrics.add_metric(name="WorkOrdersNotModified", unit=MetricUnit.Count, value=1)
+            return not_modified(etag)
+
+        body = list_work_orders(request, now)
 
         # Record a metric for successful processing
         #metrics.add_metric(name="SuccessfulWorkOrdersQuery", unit=MetricUnit.Count, value=1)
-        
-         # Sort work orders by 'work_order_id'
-        sorted_work_orders = sorted(work_orders, key=lambda x: x.get('work_order_id', ''))
-        # Return the work_orders with CORS headers
-        return {
-            "statusCode": 200,
-            "isBase64Encoded": False,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Credentials": True,
-            },
-            "body": json.dumps(sorted_work_orders),
-        }
+
+        # Return the work_orders with CORS headers, compressed when the client accepts it
+        return build_response(200, body, event, headers={'ETag': etag} if etag else None)
+
+    except (BadRequestError, InvalidNextTokenError, InvalidFieldsError) as e:
+        logger.warning(f"Rejected work order list request: {e}")
+        return build_response(400, {'error': str(e)}, event)
+
+    except ForbiddenError as e:
+        logger.warning(f"Forbidden work order list request: {e}")
+        return build_response(403, {'error': str(e)}, event)
+
+    except NotFoundError as e:
+        return build_response(404, {'error': str(e)}, event)
 
     except Exception as e:
         logger.exception("Error querying DynamoDB")
-        
+
         # Record a metric for failed processing
        # metrics.add_metric(name="FailedWorkOrdersQuery", unit=MetricUnit.Count, value=1)
 
@@ -0,0 +1,283 @@
+import os
+
+from aws_cdk import (
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_lambda_python_alpha as lambda_python,
+    Duration,
+    RemovalPolicy,
+    aws_dynamodb as dynamodb,
+    aws_logs as logs,
+    aws_sqs as sqs,
+    aws_cloudwatch as cloudwatch,
+    triggers,
+)
+from constructs import Construct
+from cdk_nag import NagSuppressions, NagPackSuppression
+
+
+class WorkOrderViewStack(Construct):
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        work_order_view_table: dynamodb.Table,
+        dynamo_db_workorder_table: str,
+        dynamo_db_location_table: str,
+        work_order_table_stream_arn: str,
+        location_table_stream_arn: str,
+        view_shards: int,
+        shared_layer: lambda_.ILayerVersion,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        # Define function name first
+        function_name = f"{construct_id.lower()}-view-sync"
+
+        # Create explicit log group for view sync function
+        view_sync_log_group = logs.LogGroup(
+            self,
+            "WorkOrderViewSyncLogGroup",
+            log_group_name=f"/aws/lambda/{function_name}",
+            retention=logs.RetentionDays.ONE_WEEK,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # a lambda function maintaining the denormalized work order view
+        view_sync_fn = lambda_python.PythonFunction(
+            self,
+            "WorkOrderViewSync",
+            function_name=function_name,
+            entry=f"{os.path.dirname(os.path.realpath(__file__))}/viewsync",
+            index="index.py",
+            handler="lambda_handler",
+            runtime=lambda_.Runtime.PYTHON_3_13,
+            timeout=Duration.seconds(60),
+            memory_size=256,
+            layers=[shared_layer],
+            environment={
+                "LOG_LEVEL": "DEBUG",
+                "POWERTOOLS_SERVICE_NAME": "WorkOrderViewFlow",
+                "WORK_ORDER_TABLE_NAME": dynamo_db_workorder_table,
+                "LOCATION_TABLE_NAME": dynamo_db_location_table,
+                "WORK_ORDER_VIEW_TABLE_NAME": work_order_view_table.table_name,
+                "VIEW_SHARDS": str(view_shards),
+                "VIEW_VERSION_COALESCE_SECONDS": "5",
+            },
+        )
+
+        work_order_view_table.grant_read_write_data(view_sync_fn)
+
+        view_sync_fn_policy = iam.Policy(self, "WorkOrderViewSyncFnPolicy")
+
+        view_sync_fn_policy.add_statements(
+            iam.PolicyStatement(
+                sid="SourceTableStreams",
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "dynamodb:DescribeStream",
+                    "dynamodb:GetRecords",
+                    "dynamodb:GetShardIterator",
+                    "dynamodb:ListStreams",
+                ],
+                resources=[work_order_table_stream_arn, location_table_stream_arn],
+            ),
+            iam.PolicyStatement(
+                sid="SourceTableReads",
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "dynamodb:GetItem",
+                    "dynamodb:Query",
+                ],
+                resources=["*"],
+            ),
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "logs:CreateLogGroup",
+                    "logs:CreateLogStream",
+                    "logs:PutLogEvents",
+                ],
+                resources=["*"],
+            ),
+        )
+
+        # Attach the IAM policy to the Lambda function's role
+        view_sync_fn.role.attach_inline_policy(view_sync_fn_policy)
+
+        # Records still failing after the retries are parked here instead of being dropped, so the
+        # view can be repaired from the shard and sequence range in the message, and the alarm flags
+        # the drift
+        sync_failure_queue = sqs.Queue(
+            self,
+            "WorkOrderViewSyncFailureQueue",
+            retention_period=Duration.days(14),
+            enforce_ssl=True,
+        )
+        NagSuppressions.add_resource_suppressions(
+            sync_failure_queue,
+            [
+                NagPackSuppression(
+                    id="AwsSolutions-SQS3",
+                    reason="This queue is the on-failure destination of the view sync stream mappings.",
+                )
+            ],
+        )
+        cloudwatch.Alarm(
+            self,
+            "WorkOrderViewSyncFailureAlarm",
+            alarm_description="Work order view sync dropped stream records; the view is out of sync.",
+            metric=sync_failure_queue.metric_approximate_number_of_messages_visible(period=Duration.minutes(5)),
+            threshold=0,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            evaluation_periods=1,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+
+        # Both sources start from the oldest record so recent changes replay into the view
+        stream_mappings = []
+        for mapping_id, stream_arn in (
+            ("WorkOrderStreamMapping", work_order_table_stream_arn),
+            ("LocationStreamMapping", location_table_stream_arn),
+        ):
+            mapping = lambda_.EventSourceMapping(
+                self,
+                mapping_id,
+                target=view_sync_fn,
+                event_source_arn=stream_arn,
+                starting_position=lambda_.StartingPosition.TRIM_HORIZON,
+                batch_size=100,
+                bisect_batch_on_error=True,
+                retry_attempts=3,
+                on_failure=lambda_event_sources.SqsDlq(sync_failure_queue),
+            )
+            mapping.node.add_dependency(view_sync_fn_policy)
+            stream_mappings.append(mapping)
+
+        # One-time backfill of the work orders that existed before the stream mappings, run once the
+        # mappings are in place. Re-run by hand (see backfill_handler) to rebuild the view.
+        backfill_function_name = f"{construct_id.lower()}-view-backfill"
+        view_backfill_log_group = logs.LogGroup(
+            self,
+            "WorkOrderViewBackfillLogGroup",
+            log_group_name=f"/aws/lambda/{backfill_function_name}",
+            retention=logs.RetentionDays.ONE_WEEK,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+        view_backfill_fn = lambda_python.PythonFunction(
+            self,
+            "WorkOrderViewBackfill",
+            function_name=backfill_function_name,
+            entry=f"{os.path.dirname(os.path.realpath(__file__))}/viewsync",
+            index="index.py",
+            handler="backfill_handler",
+            runtime=lambda_.Runtime.PYTHON_3_13,
+            timeout=Duration.minutes(15),
+            memory_size=1024,
+            layers=[shared_layer],
+            environment={
+                "LOG_LEVEL": "INFO",
+                "POWERTOOLS_SERVICE_NAME": "WorkOrderViewFlow",
+                "WORK_ORDER_TABLE_NAME": dynamo_db_workorder_table,
+                "LOCATION_TABLE_NAME": dynamo_db_location_table,
+                "WORK_ORDER_VIEW_TABLE_NAME": work_order_view_table.table_name,
+                "VIEW_SHARDS": str(view_shards),
+                "BACKFILL_SEGMENTS": "8",
+            },
+        )
+        work_order_view_table.grant_read_write_data(view_backfill_fn)
+        view_backfill_fn_policy = iam.Policy(
+            self,
+            "WorkOrderViewBackfillFnPolicy",
+            statements=[
+                iam.PolicyStatement(
+                    sid="SourceTableReads",
+                    effect=iam.Effect.ALLOW,
+                    actions=[
+                        "dynamodb:GetItem",
+                        "dynamodb:Scan",
+                    ],
+                    resources=["*"],
+                ),
+            ],
+        )
+        view_backfill_fn.role.attach_inline_policy(view_backfill_fn_policy)
+        triggers.Trigger(
+            self,
+            "WorkOrderViewBackfillTrigger",
+            handler=view_backfill_fn,
+            timeout=Duration.minutes(15),
+            execute_after=[view_backfill_fn_policy, *stream_mappings],
+            execute_on_handler_change=False,
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            view_backfill_fn_policy,
+            [
+                NagPackSuppression(
+                    id="AwsSolutions-IAM5",
+                    reason="The backfill scans the source Dynamo tables, whose names are only known at deploy time.",
+                )
+            ],
+            True,
+        )
+        NagSuppressions.add_resource_suppressions(
+            view_backfill_fn,
+            [
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": """Certain policies will implement wildcard permissions to expedite development. 
+            TODO: Replace on Production environment (Path to Production)""",
+                },
+                {
+                    "id": "AwsSolutions-IAM4",
+                    "reason": """Prototype will use managed policies to expedite development. 
+                        TODO: Replace on Production environment (Path to Production)""",
+                    "appliesTo": [
+                        "Policy::arn:<AWS::Partition>:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-L1",
+                    "reason": """Policy managed by AWS can not specify a different runtime version""",
+                },
+            ],
+            True,
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            view_sync_fn_policy,
+            [
+                NagPackSuppression(
+                    id="AwsSolutions-IAM5",
+                    reason="This Lambda has wildcard permissions to read the source Dynamo tables and manage CloudWatch Logs log groups.",
+                )
+            ],
+            True,
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            view_sync_fn,
+            [
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": """Certain policies will implement wildcard permissions to expedite development. 
+            TODO: Replace on Production environment (Path to Production)""",
+                },
+                {
+                    "id": "AwsSolutions-IAM4",
+                    "reason": """Prototype will use managed policies to expedite development. 
+                        TODO: Replace on Production environment (Path to Production)""",
+                    "appliesTo": [
+                        "Policy::arn:<AWS::Partition>:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-L1",
+                    "reason": """Policy managed by AWS can not specify a different runtime version""",
+                },
+            ],
+            True,
+        )
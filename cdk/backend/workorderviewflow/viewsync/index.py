@@ -0,0 +1,228 @@
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from viewkeys import VIEW_VERSION_KEY, view_collection
+
+logger = Logger()
+
+WORK_ORDER_TABLE_NAME = os.getenv("WORK_ORDER_TABLE_NAME")
+LOCATION_TABLE_NAME = os.getenv("LOCATION_TABLE_NAME")
+WORK_ORDER_VIEW_TABLE_NAME = os.getenv("WORK_ORDER_VIEW_TABLE_NAME")
+
+# The list API derives its ETags from the VIEW_VERSION_KEY change counter. An instance bumps it at
+# most once per VIEW_VERSION_COALESCE_SECONDS; the list API waits that long on top of its settle lag
+# before handing out ETags, so a coalesced change is always covered by the next ETag.
+VIEW_VERSION_COALESCE_SECONDS = float(os.getenv("VIEW_VERSION_COALESCE_SECONDS", "5"))
+# Parallel segments of the backfill's scan of the work orders table
+BACKFILL_SEGMENTS = int(os.getenv("BACKFILL_SEGMENTS", "8"))
+SAFETY_SUMMARY_LENGTH = 280
+
+dynamodb = boto3.resource('dynamodb')
+work_orders_table = dynamodb.Table(WORK_ORDER_TABLE_NAME)
+locations_table = dynamodb.Table(LOCATION_TABLE_NAME)
+view_table = dynamodb.Table(WORK_ORDER_VIEW_TABLE_NAME)
+deserializer = TypeDeserializer()
+
+# When this instance last bumped the change counter
+last_version_bump = 0.0
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def deserialize(image):
+    return {name: deserializer.deserialize(value) for name, value in image.items()}
+
+
+def table_name_from_arn(event_source_arn):
+    # arn:aws:dynamodb:region:account:table/<name>/stream/<label>
+    return event_source_arn.split(":table/", 1)[1].split("/", 1)[0]
+
+
+def summarize_safety_check(work_order):
+    """
+    Short plain-text summary of the latest safety check report stored on the work order.
+    """
+    report = work_order.get('safetycheckresponse')
+    if not report:
+        return None
+    # The processor stores the report JSON encoded; older or hand-written values may be plain text
+    try:
+        decoded = json.loads(report)
+        if isinstance(decoded, str):
+            report = decoded
+    except ValueError:
+        pass
+    text = html.unescape(TAG_PATTERN.sub(" ", report))
+    text = WHITESPACE_PATTERN.sub(" ", text).strip()
+    if len(text) > SAFETY_SUMMARY_LENGTH:
+        text = text[:SAFETY_SUMMARY_LENGTH].rsplit(" ", 1)[0] + "..."
+    return {
+        'performedAt': work_order.get('safetyCheckPerformedAt'),
+        'summary': text,
+    }
+
+
+def get_location(location_name):
+    if not location_name:
+        return None
+    return locations_table.get_item(Key={'location_name': location_name}).get('Item')
+
+
+def put_work_order_view(work_order, location_details=None):
+    view_item = dict(work_order)
+    view_item['collection'] = view_collection(work_order['work_order_id'])
+    if location_details is None:
+        location_details = get_location(work_order.get('location_name'))
+    view_item['location_details'] = location_details
+    view_item['latest_safety_check'] = summarize_safety_check(work_order)
+    put_kwargs = {}
+    if 'updatedAt' in work_order:
+        # Never replace a view with an older image, e.g. a stream record replayed after the backfill
+        put_kwargs = {
+            'ConditionExpression': 'attribute_not_exists(#updatedAt) OR #updatedAt <= :updatedAt',
+            'ExpressionAttributeNames': {'#updatedAt': 'updatedAt'},
+            'ExpressionAttributeValues': {':updatedAt': work_order['updatedAt']},
+        }
+    try:
+        view_table.put_item(Item=view_item, **put_kwargs)
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"View of work order {work_order['work_order_id']} is already newer")
+
+
+def delete_work_order_view(work_order_id):
+    view_table.delete_item(Key={'collection': view_collection(work_order_id), 'work_order_id': work_order_id})
+
+
+def update_location_details(location_name, location):
+    """
+    Fan a location change out to the views of every work order at that location.
+    """
+    query_kwargs = {
+        'IndexName': 'LocationIndex',
+        'KeyConditionExpression': Key('location_name').eq(location_name),
+        'ProjectionExpression': 'work_order_id',
+    }
+    while True:
+        response = work_orders_table.query(**query_kwargs)
+        for work_order in response.get('Items', []):
+            try:
+                view_table.update_item(
+                    Key={'collection': view_collection(work_order['work_order_id']), 'work_order_id': work_order['work_order_id']},
+                    UpdateExpression='SET #location_details = :location_details',
+                    ConditionExpression='attribute_exists(work_order_id)',
+                    ExpressionAttributeNames={'#location_details': 'location_details'},
+                    ExpressionAttributeValues={':location_details': location},
+                )
+            except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+                # The work order's own stream record will create the view with the new location
+                logger.info(f"No view yet for work order {work_order['work_order_id']}")
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return
+        query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+
+def bump_view_version():
+    global last_version_bump
+    now = time.time()
+    if now - last_version_bump < VIEW_VERSION_COALESCE_SECONDS:
+        return
+    view_table.update_item(
+        Key=VIEW_VERSION_KEY,
+        UpdateExpression='ADD #version :one SET #changedAt = :now',
+        ExpressionAttributeNames={'#version': 'version', '#changedAt': 'changedAt'},
+        ExpressionAttributeValues={':one': 1, ':now': Decimal(str(now))},
+    )
+    last_version_bump = now
+
+
+def handle_work_order_record(record):
+    if record['eventName'] == 'REMOVE':
+        keys = deserialize(record['dynamodb']['Keys'])
+        delete_work_order_view(keys['work_order_id'])
+    else:
+        put_work_order_view(deserialize(record['dynamodb']['NewImage']))
+
+
+def handle_location_record(record):
+    keys = deserialize(record['dynamodb']['Keys'])
+    if record['eventName'] == 'REMOVE':
+        update_location_details(keys['location_name'], None)
+    else:
+        update_location_details(keys['location_name'], deserialize(record['dynamodb']['NewImage']))
+
+
+@logger.inject_lambda_context
+def lambda_handler(event, _context: LambdaContext):
+    """
+    DynamoDB Streams consumer keeping the denormalized work order view table in sync with the
+    work orders and locations tables. Writes are idempotent, so a failed batch is safely retried.
+    """
+    for record in event['Records']:
+        table_name = table_name_from_arn(record['eventSourceARN'])
+        if table_name == WORK_ORDER_TABLE_NAME:
+            handle_work_order_record(record)
+        elif table_name == LOCATION_TABLE_NAME:
+            handle_location_record(record)
+        else:
+            logger.warning(f"Ignoring record from unexpected table {table_name}")
+
+    # After the writes, so a client revalidating against the new version sees the new data. A bump
+    # skipped by the coalescing is covered by the list API's extra settle time.
+    bump_view_version()
+
+
+def backfill_segment(segment, total_segments):
+    """Write the view of every work order in one segment of the work orders table."""
+    locations = {}
+    count = 0
+    scan_kwargs = {'Segment': segment, 'TotalSegments': total_segments}
+    while True:
+        response = work_orders_table.scan(**scan_kwargs)
+        for work_order in response.get('Items', []):
+            location_name = work_order.get('location_name')
+            if location_name not in locations:
+                locations[location_name] = get_location(location_name)
+            put_work_order_view(work_order, locations[location_name])
+            count += 1
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return count
+        scan_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+
+@logger.inject_lambda_context
+def backfill_handler(event, _context: LambdaContext):
+    """
+    One-time rebuild of the view from the source tables, run by the deployment trigger. The stream
+    mappings only see changes made after (or within 24 hours before) they were created, so work
+    orders imported earlier would otherwise never reach the view. Safe to re-run; it can also be
+    invoked by hand with {"segment": n, "totalSegments": m} to rebuild one slice of a large table.
+    """
+    event = event or {}
+    if "segment" in event:
+        segments = [int(event["segment"])]
+        total_segments = int(event["totalSegments"])
+    else:
+        total_segments = BACKFILL_SEGMENTS
+        segments = list(range(total_segments))
+
+    with ThreadPoolExecutor(max_workers=len(segments), thread_name_prefix="view-backfill") as executor:
+        written = sum(executor.map(lambda segment: backfill_segment(segment, total_segments), segments))
+
+    global last_version_bump
+    last_version_bump = 0.0
+    bump_view_version()
+    logger.info(f"Backfilled {written} work order views")
+    return {"written": written}
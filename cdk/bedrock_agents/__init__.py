@@ -12,11 +12,14 @@ from aws_cdk import (
     RemovalPolicy,
     aws_bedrock as bedrock,
     aws_logs as logs,
+    aws_ssm as ssm,
     CustomResource,
 )
 from constructs import Construct
 from cdk_nag import NagSuppressions, NagPackSuppression
 
+import core_constructs as core
+
 
 class BedrockAgentsStack(NestedStack):
     """Nested stack for Bedrock Agents functionality"""
@@ -106,6 +109,7 @@ class BedrockAgentsStack(NestedStack):
                 name="work_order_id",
                 type=dynamodb.AttributeType.STRING
             ),
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
             removal_policy=RemovalPolicy.DESTROY,
         )
         
@@ -118,6 +122,48 @@ class BedrockAgentsStack(NestedStack):
             projection_type=dynamodb.ProjectionType.ALL
         )
 
+        # Day-bucketed schedule index so upcoming work can be queried by start time without a scan
+        work_orders_table.add_global_secondary_index(
+            index_name="ScheduleDayIndex",
+            partition_key=dynamodb.Attribute(
+                name="schedule_day",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="scheduled_start_timestamp",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL
+        )
+
+        # Day-bucketed change index used by the delta-sync list mode
+        work_orders_table.add_global_secondary_index(
+            index_name="UpdatedDayIndex",
+            partition_key=dynamodb.Attribute(
+                name="updated_day",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="updatedAt",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL
+        )
+
+        # Per-technician index backing the owner list mode
+        work_orders_table.add_global_secondary_index(
+            index_name="OwnerIndex",
+            partition_key=dynamodb.Attribute(
+                name="owner_name",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="scheduled_start_timestamp",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL
+        )
+
         locations_table = dynamodb.Table(
             self,
             "LocationsTable",
@@ -127,9 +173,25 @@ class BedrockAgentsStack(NestedStack):
                 name="location_name",
                 type=dynamodb.AttributeType.STRING
             ),
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
             removal_policy=RemovalPolicy.DESTROY,
         )
 
+        # Spatial index: geohash cells (~39 x 20 km) partitioned, full geohash for finer prefixes
+        locations_table.add_global_secondary_index(
+            index_name="GeohashIndex",
+            partition_key=dynamodb.Attribute(
+                name="geohash_prefix",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="geohash",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=["latitude", "longitude"],
+        )
+
         hazards_table = dynamodb.Table(
             self,
             "HazardsTable",
@@ -239,6 +301,18 @@ class BedrockAgentsStack(NestedStack):
             projection_type=dynamodb.ProjectionType.ALL
         )
 
+        # Version stamp of the locations table, bumped on every import so warm location caches reload
+        locations_version_parameter = ssm.StringParameter(
+            self,
+            "LocationsVersionParameter",
+            parameter_name=f"/{construct_id.lower()}/locations-version",
+            string_value="0",
+            description="Changes whenever the locations table is written",
+        )
+
+        # Shared helper modules used by the Lambda functions here and in the backend stack
+        shared_layer = core.CoreSharedLayer(self, "SharedLayer")
+
         # Create Lambda execution role
         lambda_execution_role = iam.Role(
             self,
@@ -305,7 +379,8 @@ class BedrockAgentsStack(NestedStack):
                     "dynamodb:Query",
                     "dynamodb:Scan",
                     "dynamodb:BatchWriteItem",
-                    "dynamodb:PutItem"
+                    "dynamodb:PutItem",
+                    "dynamodb:UpdateItem"
                 ],
                 resources=[
                     work_orders_table.table_arn,
@@ -326,6 +401,9 @@ class BedrockAgentsStack(NestedStack):
             )
         )
 
+        locations_version_parameter.grant_read(lambda_execution_role)
+        locations_version_parameter.grant_write(lambda_execution_role)
+
         # Define function name first - use the exact name that appears in AWS
         function_name = f"{construct_id.lower()}-data-import"
         
@@ -349,8 +427,10 @@ class BedrockAgentsStack(NestedStack):
             role=lambda_execution_role,
             timeout=Duration.seconds(300),
             memory_size=256,
+            layers=[shared_layer],
             environment={
                 "S3_BUCKET_NAME": data_bucket.bucket_name,
+                "LOCATIONS_VERSION_PARAMETER_NAME": locations_version_parameter.parameter_name,
                 "WORK_ORDERS_TABLE_NAME": work_orders_table.table_name,
                 "LOCATIONS_TABLE_NAME": locations_table.table_name,
                 "HAZARDS_TABLE_NAME": hazards_table.table_name,
@@ -447,7 +527,11 @@ class BedrockAgentsStack(NestedStack):
             role=lambda_execution_role,
             timeout=Duration.seconds(30),
             memory_size=256,
+            layers=[shared_layer],
             environment={
+                "LOCATIONS_VERSION_PARAMETER_NAME": locations_version_parameter.parameter_name,
+                "LOCATION_CACHE_TTL_SECONDS": "300",
+                "LOCATION_CACHE_MAX_SIZE": "1000",
                 "WORK_ORDERS_TABLE_NAME": work_orders_table.table_name,
                 "LOCATIONS_TABLE_NAME": locations_table.table_name,
                 "HAZARDS_TABLE_NAME": hazards_table.table_name,
@@ -1080,6 +1164,10 @@ class BedrockAgentsStack(NestedStack):
         # Store references to resources for outputs
         self.work_orders_table_name = work_orders_table.table_name
         self.locations_table_name = locations_table.table_name
+        self.locations_version_parameter_name = locations_version_parameter.parameter_name
+        self.work_orders_table_stream_arn = work_orders_table.table_stream_arn
+        self.locations_table_stream_arn = locations_table.table_stream_arn
+        self.shared_layer = shared_layer
         self.supervisor_agent_id = supervisor_agent.attr_agent_id
         self.supervisor_agent_alias_id = supervisor_agent_alias.attr_agent_alias_id
 
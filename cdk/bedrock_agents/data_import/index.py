@@ -3,8 +3,10 @@ import csv
 import json
 import os
 import io
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import cfnresponse
+from location_cache import bump_locations_version
+import geohash
 
 dynamodb = boto3.resource('dynamodb')
 
@@ -48,6 +50,9 @@ def update_work_order_dates(items):
             
             # Update the timestamp
             item['scheduled_start_timestamp'] = new_dt.isoformat()
+
+            # Partition key of the ScheduleDayIndex GSI
+            item['schedule_day'] = new_dt.date().isoformat()
             
         if 'scheduled_finish_timestamp' in item:
             # Parse the original timestamp to keep the time portion
@@ -68,6 +73,68 @@ def update_work_order_dates(items):
     
     return items
 
+def change_stamp():
+    """
+    Return the updatedAt/updated_day pair read by the delta-sync list mode (UpdatedDayIndex GSI).
+    updatedAt stays a naive UTC timestamp so it compares as a string with the processor's writes.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.isoformat(timespec='microseconds'), now.date().isoformat()
+
+def stamp_work_order_updates(items):
+    """
+    Set the change stamp on every imported work order.
+    """
+    updated_at, updated_day = change_stamp()
+    for item in items:
+        item['updatedAt'] = updated_at
+        item['updated_day'] = updated_day
+    return items
+
+def soft_delete_missing_work_orders(table, items):
+    """
+    Tombstone the work orders that are no longer in the import by setting deletedAt.
+    The delta-sync list mode reports them as deleted; every other reader skips them.
+    """
+    imported_ids = {item['work_order_id'] for item in items}
+    updated_at, updated_day = change_stamp()
+    scan_kwargs = {
+        'ProjectionExpression': 'work_order_id, deletedAt',
+    }
+    deleted = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+        for existing in response.get('Items', []):
+            if existing['work_order_id'] in imported_ids or 'deletedAt' in existing:
+                continue
+            try:
+                table.update_item(
+                    Key={'work_order_id': existing['work_order_id']},
+                    UpdateExpression='SET deletedAt = :updatedAt, updatedAt = :updatedAt, updated_day = :updatedDay',
+                    ConditionExpression='attribute_exists(work_order_id) AND attribute_not_exists(deletedAt)',
+                    ExpressionAttributeValues={':updatedAt': updated_at, ':updatedDay': updated_day},
+                )
+                deleted += 1
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                print(f"Work order {existing['work_order_id']} was already removed")
+        if 'LastEvaluatedKey' not in response:
+            return deleted
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def add_location_geohashes(items):
+    """
+    Set the geohash attributes read by the spatial work order search (GeohashIndex GSI).
+    """
+    for item in items:
+        try:
+            latitude, longitude = float(item['latitude']), float(item['longitude'])
+        except (KeyError, TypeError, ValueError):
+            print(f"No usable coordinates for location {item.get('location_name')}")
+            continue
+        item['geohash'] = geohash.encode(latitude, longitude)
+        item['geohash_prefix'] = item['geohash'][:geohash.INDEX_PRECISION]
+    return items
+
 def batch_write_items(table, items):
     with table.batch_writer() as batch:
         for item in items:
@@ -109,10 +176,20 @@ def handler(event, context):
                 # Update work order dates if this is the work_orders table
                 if table_name == 'work_orders':
                     items = update_work_order_dates(items)
+                    items = stamp_work_order_updates(items)
+                if table_name == 'locations':
+                    items = add_location_geohashes(items)
                     
                 table = get_table(table_name.upper())
                 batch_write_items(table, items)
                 results[table_name] = len(items)
+
+                if table_name == 'work_orders':
+                    results['work_orders_deleted'] = soft_delete_missing_work_orders(table, items)
+
+                # Invalidate warm location caches
+                if table_name == 'locations':
+                    bump_locations_version(os.environ.get('LOCATIONS_VERSION_PARAMETER_NAME'))
         
         response_data = {
             'message': 'Data import completed successfully',
@@ -4,6 +4,7 @@ import os
 import logging
 from boto3.dynamodb.conditions import Key
 from datetime import datetime
+from location_cache import LocationCache
 
 
 log_level = os.environ.get("LOG_LEVEL", "INFO").strip().upper()
@@ -28,11 +29,25 @@ def get_work_order(work_order_id):
         Key={'work_order_id': work_order_id}
     ).get('Item', {})
 
-def get_location_details(location_name):
+def load_locations(location_names):
     locations_table = dynamodb.Table(os.environ['LOCATIONS_TABLE_NAME'])
-    return locations_table.get_item(
-        Key={'location_name': location_name}
-    ).get('Item', {})
+    locations = {}
+    for location_name in location_names:
+        item = locations_table.get_item(
+            Key={'location_name': location_name}
+        ).get('Item')
+        if item:
+            locations[location_name] = item
+    return locations
+
+# Kept at module level so warm invocations reuse the cached locations
+location_cache = LocationCache(
+    loader=load_locations,
+    version_parameter_name=os.environ.get('LOCATIONS_VERSION_PARAMETER_NAME'),
+)
+
+def get_location_details(location_name):
+    return location_cache.get(location_name) or {}
 
 def get_hazards_for_location(location_name):
     location_hazards_table = dynamodb.Table(os.environ['LOCATION_HAZARDS_TABLE_NAME'])
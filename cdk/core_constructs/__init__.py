@@ -6,5 +6,6 @@ from .core_apigateway import *
 from .core_cognito import *
 from .core_dynamodb import *
 from .core_lambda import *
+from .core_layer import *
 from .core_s3 import *
 from .core_wsapigateway import *
@@ -51,9 +51,12 @@ class CoreApiGateway(Construct):
             default_cors_preflight_options=apigateway.CorsOptions(
                 allow_origins=apigateway.Cors.ALL_ORIGINS,
                 allow_methods=apigateway.Cors.ALL_METHODS,
-                allow_headers=apigateway.Cors.DEFAULT_HEADERS,
+                allow_headers=apigateway.Cors.DEFAULT_HEADERS + ["If-None-Match"],
             ),
-            binary_media_types=["application/pdf", "text/plain"],
+            # application/json lets Lambda proxy integrations return compressed, base64 encoded JSON
+            # to clients that send "Accept: application/json". JSON request bodies then arrive
+            # base64 encoded too, see api_response.parse_json_body.
+            binary_media_types=["application/pdf", "text/plain", "application/json"],
             deploy_options=apigateway.StageOptions(
                 logging_level=apigateway.MethodLoggingLevel.INFO,
                 access_log_destination=apigateway.LogGroupLogDestination(self.log_group),
@@ -207,6 +210,9 @@ class CoreApiGateway(Construct):
             resource = method.node.find_child("Resource")
             if method.http_method == "OPTIONS":
                 resource.add_property_override("AuthorizationType", apigateway.AuthorizationType.NONE)
+                # Keep the CORS pre-flight MOCK integration textual whatever the binary media types match
+                resource.add_property_override("Integration.ContentHandling", "CONVERT_TO_TEXT")
+                resource.add_property_override("Integration.IntegrationResponses.0.ContentHandling", "CONVERT_TO_TEXT")
                 NagSuppressions.add_resource_suppressions(
                     construct=resource,
                     suppressions=[
@@ -294,6 +300,9 @@ class CoreApiGateway(Construct):
             resource = method.node.find_child("Resource")
             if method.http_method == "OPTIONS":
                 resource.add_property_override("AuthorizationType", apigateway.AuthorizationType.NONE)
+                # Keep the CORS pre-flight MOCK integration textual whatever the binary media types match
+                resource.add_property_override("Integration.ContentHandling", "CONVERT_TO_TEXT")
+                resource.add_property_override("Integration.IntegrationResponses.0.ContentHandling", "CONVERT_TO_TEXT")
                 NagSuppressions.add_resource_suppressions(
                     construct=resource,
                     suppressions=[
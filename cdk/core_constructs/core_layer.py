@@ -0,0 +1,33 @@
+# Copyright 2022 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: LicenseRef-.amazon.com.-AmznSL-1.0
+# Licensed under the Amazon Software License  http://aws.amazon.com/asl/
+
+import os
+
+from aws_cdk import (
+    aws_lambda as lambda_,
+    RemovalPolicy,
+)
+from constructs import Construct
+
+SHARED_LAYER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "shared_layer")
+
+
+class CoreSharedLayer(lambda_.LayerVersion):
+    """Layer with the helper modules shared by the Lambda functions (cdk/shared_layer/python)."""
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        **kwargs,
+    ):
+        super().__init__(
+            scope,
+            construct_id,
+            code=lambda_.Code.from_asset(SHARED_LAYER_PATH),
+            compatible_runtimes=[lambda_.Runtime.PYTHON_3_13],
+            description="Shared helper modules for the field workforce safety functions",
+            removal_policy=RemovalPolicy.DESTROY,
+            **kwargs,
+        )
@@ -0,0 +1,153 @@
+import base64
+import gzip
+import hashlib
+import json
+from decimal import Decimal
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - falls back to the standard library encoder
+    msgspec = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+
+# Bodies smaller than this aren't worth the compression CPU or the base64 overhead
+MIN_COMPRESSION_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Credentials": "true",
+    "Access-Control-Expose-Headers": "ETag",
+}
+
+# msgspec encodes Decimal (what DynamoDB returns for numbers) natively as a JSON number
+_encoder = msgspec.json.Encoder(decimal_format="number") if msgspec else None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(body):
+    """Serialize `body` to compact JSON bytes."""
+    if _encoder is not None:
+        return _encoder.encode(body)
+    return json.dumps(body, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def parse_json_body(event):
+    """
+    Decode the JSON request body of an API Gateway proxy event. With binary media types enabled on
+    the API, API Gateway hands bodies over base64 encoded.
+    """
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return json.loads(body)
+
+
+def _header(event, name):
+    for key, value in ((event or {}).get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def negotiate_encoding(event):
+    """
+    Pick the best supported content coding from the request's Accept-Encoding header:
+    brotli when the module is available, then gzip, otherwise None.
+    """
+    accept_encoding = _header(event, "accept-encoding")
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    def acceptable(coding):
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and acceptable("br"):
+        return "br"
+    if acceptable("gzip"):
+        return "gzip"
+    return None
+
+
+def compute_etag(*parts):
+    """Strong ETag over the canonical JSON of `parts`."""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(event, etag):
+    """True when the request's If-None-Match header lists `etag` (or *)."""
+    if_none_match = _header(event, "if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag):
+    return {
+        "statusCode": 304,
+        "isBase64Encoded": False,
+        "headers": {"ETag": etag, **CORS_HEADERS},
+        "body": "",
+    }
+
+
+def compress(payload, encoding):
+    if encoding == "br":
+        return brotli.compress(payload, quality=BROTLI_QUALITY)
+    return gzip.compress(payload, compresslevel=GZIP_LEVEL)
+
+
+def build_response(status_code, body, event=None, headers=None):
+    """
+    Build an API Gateway proxy response with a JSON body, compressed with the best coding the
+    caller accepts and returned base64 encoded when compressed.
+    """
+    payload = dumps(body)
+    response_headers = {
+        "Content-Type": "application/json",
+        "Vary": "Accept-Encoding",
+        **CORS_HEADERS,
+        **(headers or {}),
+    }
+
+    encoding = negotiate_encoding(event) if len(payload) >= MIN_COMPRESSION_BYTES else None
+    if encoding is None:
+        return {
+            "statusCode": status_code,
+            "isBase64Encoded": False,
+            "headers": response_headers,
+            "body": payload.decode("utf-8"),
+        }
+
+    response_headers["Content-Encoding"] = encoding
+    return {
+        "statusCode": status_code,
+        "isBase64Encoded": True,
+        "headers": response_headers,
+        "body": base64.b64encode(compress(payload, encoding)).decode("ascii"),
+    }
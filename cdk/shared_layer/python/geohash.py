@@ -0,0 +1,114 @@
+"""
+Geohash encoding and the geometry helpers behind the spatial work order search.
+
+Locations store their full geohash plus its first INDEX_PRECISION characters, which partition the
+locations table's GeohashIndex GSI. A search area is covered with geohash cells, each cell is one
+Query (the partition, narrowed with begins_with on the full geohash for finer cells), and the
+candidates are refined with the exact distance or bounds check.
+"""
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Length of the stored geohash (~5 m cells) and of the GSI partition key prefix (~39 x 20 km cells)
+GEOHASH_PRECISION = 9
+INDEX_PRECISION = 4
+# Finest cells used to cover a search area; finer cells mean fewer false positives but more queries
+MAX_COVER_PRECISION = 7
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits, bit_count, even = 0, 0, True
+    while len(geohash) < precision:
+        value, value_range = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(geohash)
+
+
+def cell_size(precision):
+    """(latitude, longitude) extent in degrees of a cell at `precision`."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def _steps(low, high, step):
+    value = low
+    while value < high:
+        yield value
+        value += step
+    yield high
+
+
+def covering_cells(min_latitude, min_longitude, max_latitude, max_longitude, precision):
+    """
+    Geohash cells at `precision` that together cover the bounding box. Sampling the box on a grid
+    as fine as the cells, edges included, hits every cell the box touches.
+    """
+    lat_step, lon_step = cell_size(precision)
+    return {
+        encode(latitude, longitude, precision)
+        for latitude in _steps(min_latitude, max_latitude, lat_step)
+        for longitude in _steps(min_longitude, max_longitude, lon_step)
+    }
+
+
+def cover(min_latitude, min_longitude, max_latitude, max_longitude, max_cells):
+    """
+    Cover the bounding box with the finest cells (between INDEX_PRECISION and
+    MAX_COVER_PRECISION) that need at most `max_cells` queries. Returns None when even
+    INDEX_PRECISION cells need more than that.
+    """
+    for precision in range(MAX_COVER_PRECISION, INDEX_PRECISION - 1, -1):
+        lat_step, lon_step = cell_size(precision)
+        # Upper bound on the cell count, so the finest levels aren't enumerated for large boxes
+        estimate = (math.ceil((max_latitude - min_latitude) / lat_step) + 2) * (
+            math.ceil((max_longitude - min_longitude) / lon_step) + 2
+        )
+        if estimate > max_cells * 4:
+            continue
+        cells = covering_cells(min_latitude, min_longitude, max_latitude, max_longitude, precision)
+        if len(cells) <= max_cells:
+            return cells
+    return None
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    latitude1, longitude1, latitude2, longitude2 = map(math.radians, (latitude1, longitude1, latitude2, longitude2))
+    a = (
+        math.sin((latitude2 - latitude1) / 2) ** 2
+        + math.cos(latitude1) * math.cos(latitude2) * math.sin((longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """
+    Bounding box (min_lat, min_lon, max_lat, max_lon) enclosing the circle, clamped to valid
+    coordinates.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_latitude = math.cos(math.radians(latitude))
+    lon_delta = 180.0 if cos_latitude < 1e-9 else min(180.0, lat_delta / cos_latitude)
+    return (
+        max(-90.0, latitude - lat_delta),
+        max(-180.0, longitude - lon_delta),
+        min(90.0, latitude + lat_delta),
+        min(180.0, longitude + lon_delta),
+    )
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import boto3
+
+
+DEFAULT_TTL_SECONDS = int(os.getenv("LOCATION_CACHE_TTL_SECONDS", "300"))
+DEFAULT_MAX_SIZE = int(os.getenv("LOCATION_CACHE_MAX_SIZE", "1000"))
+# How often the locations version stamp is re-read from SSM
+DEFAULT_VERSION_CHECK_SECONDS = int(os.getenv("LOCATION_CACHE_VERSION_CHECK_SECONDS", "30"))
+
+_MISSING = object()
+
+
+class LocationCache:
+    """
+    Process-level cache of location items, shared across invocations of a warm Lambda container.
+
+    Entries expire after `ttl_seconds` and the least recently used entry is evicted once
+    `max_size` entries are held. Locations that don't exist are cached too, so a dangling
+    location_name doesn't cost a read on every call. The whole cache is dropped when the
+    version stamp in the `version_parameter_name` SSM parameter changes; writers of the locations
+    table bump it with `bump_locations_version`.
+
+    `loader` receives the set of location names missing from the cache and returns a dict of the
+    location items it found. Hit and miss counts are emitted through `metrics` when given
+    (a Powertools Metrics object).
+    """
+
+    def __init__(
+        self,
+        loader,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_size=DEFAULT_MAX_SIZE,
+        version_parameter_name=None,
+        version_check_seconds=DEFAULT_VERSION_CHECK_SECONDS,
+        metrics=None,
+    ):
+        self._loader = loader
+        self._ttl_seconds = ttl_seconds
+        self._max_size = max_size
+        self._version_parameter_name = version_parameter_name
+        self._version_check_seconds = version_check_seconds
+        self._metrics = metrics
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self._ssm = boto3.client("ssm") if version_parameter_name else None
+
+    def get(self, location_name):
+        return self.get_many([location_name]).get(location_name)
+
+    def get_many(self, location_names):
+        self._check_version()
+
+        now = time.monotonic()
+        found = {}
+        missing = set()
+        with self._lock:
+            for name in set(location_names):
+                entry = self._entries.get(name)
+                if entry is None or entry[0] <= now:
+                    missing.add(name)
+                    continue
+                self._entries.move_to_end(name)
+                if entry[1] is not _MISSING:
+                    found[name] = entry[1]
+
+        hits = len(set(location_names)) - len(missing)
+        self._add_metric("LocationCacheHit", hits)
+        self._add_metric("LocationCacheMiss", len(missing))
+
+        if missing:
+            loaded = self._loader(missing)
+            expires_at = time.monotonic() + self._ttl_seconds
+            with self._lock:
+                for name in missing:
+                    self._entries[name] = (expires_at, loaded.get(name, _MISSING))
+                    self._entries.move_to_end(name)
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+            found.update(loaded)
+
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _check_version(self):
+        if not self._version_parameter_name:
+            return
+        now = time.monotonic()
+        if now - self._version_checked_at < self._version_check_seconds:
+            return
+
+        version = self._ssm.get_parameter(Name=self._version_parameter_name)["Parameter"]["Value"]
+        self._version_checked_at = now
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def _add_metric(self, name, value):
+        if self._metrics is not None and value:
+            self._metrics.add_metric(name=name, unit="Count", value=value)
+
+
+def bump_locations_version(version_parameter_name):
+    """Invalidate every warm LocationCache by writing a new version stamp."""
+    boto3.client("ssm").put_parameter(
+        Name=version_parameter_name,
+        Value=str(time.time_ns()),
+        Type="String",
+        Overwrite=True,
+    )
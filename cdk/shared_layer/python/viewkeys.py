@@ -0,0 +1,23 @@
+"""
+Keys of the denormalized work order view table, shared by the view sync and the work order API.
+
+View items are spread over VIEW_SHARDS item collections, "work_orders#00" and up, picked by a
+stable hash of the work order id, so no single partition takes every view write. Both sides must
+run with the same VIEW_SHARDS.
+"""
+import os
+import zlib
+
+VIEW_COLLECTION_PREFIX = "work_orders#"
+VIEW_SHARDS = int(os.getenv("VIEW_SHARDS", "16"))
+# Change counter the view sync bumps after batches of work order or location changes
+VIEW_VERSION_KEY = {'collection': "meta", 'work_order_id': "version"}
+
+
+def view_collection(work_order_id, shards=VIEW_SHARDS):
+    return f"{VIEW_COLLECTION_PREFIX}{zlib.crc32(work_order_id.encode('utf-8')) % shards:02d}"
+
+
+def view_collections(shards=VIEW_SHARDS):
+    """Every view item collection, in the order paginated reads walk them."""
+    return [f"{VIEW_COLLECTION_PREFIX}{shard:02d}" for shard in range(shards)]
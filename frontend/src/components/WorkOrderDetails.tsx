@@ -1,9 +1,10 @@
 import { useLocation, useNavigate } from 'react-router-dom';
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import '@components/WorkOrderDetails.css';
 import 'leaflet/dist/leaflet.css';
-import { postSafetyCheckRequest, pollSafetyCheckStatus, postEmergencyCheckRequest } from '@lib/api';
+import { postSafetyCheckRequest, pollSafetyCheckStatus, postEmergencyCheckRequest, fetchWorkOrderReport } from '@lib/api';
 import { customAlphabet } from "nanoid";
+import { sanitizeReportHtml } from '@lib/sanitize';
 import UnifiedMap from '@components/UnifiedMap';
 import { Emergency } from '@/types/emergency';
 import {
@@ -20,6 +21,9 @@ interface SafetyCheckResponse {
   requestId: string;
   status: string;
   safetycheckresponse: string;
+  partialResponse?: string;
+  eta?: string;
+  error?: string;
 }
 
 interface LocationDetails {
@@ -39,6 +43,7 @@ interface WorkOrder {
   location_name: string;
   location_details?: LocationDetails;
   safetycheckresponse?: string;
+  safetyCheckPerformedAt?: string;
 }
 
 const WorkOrderDetails = () => {
@@ -46,11 +51,37 @@ const WorkOrderDetails = () => {
   const location = useLocation();
   const workOrder = location.state?.workOrder as WorkOrder;
   const [loading, setLoading] = useState(false);
+  // Report assembled so far, shown while the agents are still answering
+  const [partialReport, setPartialReport] = useState<string | null>(null);
+  // Expected start time while the request waits for agent capacity
+  const [queuedEta, setQueuedEta] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [isLocationVisible, setIsLocationVisible] = useState(true);
   
   const [emergencies, setEmergencies] = useState<Emergency[]>([]);
   const [loadingEmergencies, setLoadingEmergencies] = useState(false);
+  // Latest safety check report; the router state only carries it when the list was asked for it
+  const [report, setReport] = useState<string | null>(workOrder?.safetycheckresponse ?? null);
+
+  // The work order list omits report bodies, load the latest one when the pane opens
+  useEffect(() => {
+    if (!workOrder || workOrder.safetycheckresponse || !workOrder.safetyCheckPerformedAt) {
+      return;
+    }
+    let cancelled = false;
+    fetchWorkOrderReport(workOrder.work_order_id)
+      .then((latest) => {
+        if (!cancelled && latest?.safetycheckresponse) {
+          // A safety check run meanwhile has already set a newer report
+          setReport((current) => current ?? latest.safetycheckresponse ?? null);
+        }
+      })
+      .catch(() => setError('Failed to load the latest safety check report'));
+    return () => {
+      cancelled = true;
+    };
+  }, [workOrder]);
+
   if (!workOrder) {
     return <div>No details found for this Work Order.</div>;
   }
@@ -59,12 +90,12 @@ const WorkOrderDetails = () => {
   const performSafetyCheck = async () => {
     try {
       setLoading(true);
+      setPartialReport(null);
+      setQueuedEta(null);
+      // The backend loads the work order and location itself to build the prompt
       const queryObject = {
         query: "Perform work order safety checks for WorkOrder::",
-        workorderdetails: {
-          work_order_id: workOrder.work_order_id,
-          workOrderLocationAssetDetails: workOrder,
-        },
+        work_order_id: workOrder.work_order_id,
         session_id: customAlphabet("1234567890", 20)()
       };
 
@@ -105,15 +136,33 @@ const WorkOrderDetails = () => {
   };
 
 
-  const checkStatus = async (requestId: string): Promise<boolean> => {
+  // Returns true to stop polling, 'QUEUED' while the request waits for agent capacity
+  const checkStatus = async (requestId: string): Promise<boolean | 'QUEUED'> => {
     try {
       const result = (await pollSafetyCheckStatus(requestId) as unknown) as SafetyCheckResponse;
       if (result?.status === 'COMPLETED') {
-        workOrder.safetycheckresponse = result.safetycheckresponse;
+        setReport(result.safetycheckresponse);
+        setPartialReport(null);
+        setQueuedEta(null);
         setLoading(false);
         setError(null); // Clear any previous errors when successful
         return true;
       }
+      if (result?.status === 'FAILED') {
+        setPartialReport(null);
+        setQueuedEta(null);
+        setError(result.error ?? 'Safety check failed');
+        setLoading(false);
+        return true;
+      }
+      if (result?.status === 'QUEUED') {
+        setQueuedEta(result.eta ?? null);
+        return 'QUEUED';
+      }
+      setQueuedEta(null);
+      if (result?.partialResponse) {
+        setPartialReport(result.partialResponse);
+      }
       return false;
     } catch (err) {
       setError('Failed to fetch status');
@@ -130,8 +179,13 @@ const WorkOrderDetails = () => {
 
     const poll = async () => {
       try {
-        attempts++;
         const shouldStop = await checkStatus(requestId);
+        // Time spent waiting for agent capacity doesn't count towards the attempts
+        if (shouldStop === 'QUEUED') {
+          setTimeout(poll, pollInterval);
+          return;
+        }
+        attempts++;
         if (!shouldStop && attempts < maxAttempts) {
           setTimeout(poll, pollInterval);
         } else if (attempts >= maxAttempts) {
@@ -250,17 +304,25 @@ const WorkOrderDetails = () => {
         {loading ? (
           <div className="safety-check-response">
             <p>Performing Work Order Safety Check...</p>
+            {queuedEta && (
+              <p>Queued for agent capacity, expected to start at {new Date(queuedEta + 'Z').toLocaleTimeString()}</p>
+            )}
+            {partialReport && (
+              <div dangerouslySetInnerHTML={{ __html:
+                sanitizeReportHtml(partialReport.replace(/\u00b0C/g, '°C'))
+                }} />
+            )}
           </div>
         ) : error ? (
           <div className="safety-check-response">{error}</div>
-        ) : workOrder.safetycheckresponse && (
+        ) : report && (
           <div className="safety-check-response" 
-            dangerouslySetInnerHTML={{ __html:
-              workOrder.safetycheckresponse.replace(/^"|"$/g, '') // Remove leading and trailing quotes
+            dangerouslySetInnerHTML={{ __html: sanitizeReportHtml(
+              report.replace(/^"|"$/g, '') // Remove leading and trailing quotes
               .replace(/\\n/g, '')   // Remove \n characters
               .replace(/\\u00b0C/g, '°C') // Replace \u00b0C with °C (escaped version)
               .replace(/\u00b0C/g, '°C')
-               }} />
+               ) }} />
         )}
 
   </SpaceBetween>
@@ -9,12 +9,6 @@ import { getErrorMessage } from "./utils";
 import { QueryObject,EmergencyCheckQuery } from "@/types";
 import { config } from "./config";
 
-interface WorkOrderResponse {
-  body: {
-    json(): Promise<WorkOrder[]>;
-  }
-}
-
 export interface WorkOrder {
   work_order_id: string;
   asset_id: string;
@@ -22,8 +16,13 @@ export interface WorkOrder {
   location_name: string;
   owner_name: string;
   priority: number;
-  safetycheckresponse: string
-  safetyCheckPerformedAt: string;
+  // Only present when requested via `fields` or fetched with fetchWorkOrderReport
+  safetycheckresponse?: string;
+  safetyCheckPerformedAt?: string;
+  latest_safety_check?: {
+    performedAt: string;
+    summary: string;
+  } | null;
   scheduled_start_timestamp: string;
   scheduled_finish_timestamp: string;
   status: string;
@@ -96,6 +95,8 @@ const getRestInput = async (apiName: string) => {
     options: {
       headers: {
         Authorization: `Bearer ${authToken}`,
+        // Matches the API's binary media type, so compressed JSON responses are decoded
+        Accept: "application/json",
       },
     },
   };
@@ -122,34 +123,99 @@ export async function postSafetyCheckRequest(queryObject: QueryObject) {
   }
 }
 
-interface WorkOrderResponse {
-  body: {
-    json(): Promise<WorkOrder[]>;
-  }
+interface WorkOrderDeltaResponse {
+  items: WorkOrder[];
+  deleted: string[];
+  watermark: string;
+  fullResync: boolean;
+}
+
+const WORK_ORDER_SNAPSHOT_KEY = "workOrderSnapshot";
+
+interface WorkOrderSnapshot {
+  watermark: string;
+  workOrders: WorkOrder[];
 }
 
+const loadWorkOrderSnapshot = (): WorkOrderSnapshot | null => {
+  try {
+    const snapshot = localStorage.getItem(WORK_ORDER_SNAPSHOT_KEY);
+    return snapshot ? JSON.parse(snapshot) : null;
+  } catch {
+    return null;
+  }
+};
 
+const saveWorkOrderSnapshot = (snapshot: WorkOrderSnapshot) => {
+  try {
+    localStorage.setItem(WORK_ORDER_SNAPSHOT_KEY, JSON.stringify(snapshot));
+  } catch (e: unknown) {
+    // Storage full or unavailable; the next refresh falls back to a full resync
+    console.log("Could not store work order snapshot: ", getErrorMessage(e));
+    localStorage.removeItem(WORK_ORDER_SNAPSHOT_KEY);
+  }
+};
+
+// Refresh the locally stored work orders with only what changed since the last sync
 export async function postWorkOrderQuery(): Promise<WorkOrder[]> {
   try {
+    const snapshot = loadWorkOrderSnapshot();
     const restInput = await getRestInput(config.WorkOrder_API_NAME);
     const restOperation = post({
       ...restInput,
       path: `workorders`,
       options: {
         ...restInput.options,
-        body: {} // Changed from empty string to empty object
+        body: { mode: "delta", since: snapshot?.watermark ?? null }
       }
     });
-    const response = await (restOperation.response as unknown) as WorkOrderResponse;
-    
-    // Add null check and provide default empty array
-    return response.body.json() ?? [];
+    const response = await restOperation.response;
+    const delta = (await response.body.json()) as unknown as WorkOrderDeltaResponse;
+
+    let workOrders = delta.items ?? [];
+    if (!delta.fullResync && snapshot) {
+      const changed = new Map(workOrders.map((order) => [order.work_order_id, order]));
+      const deleted = new Set(delta.deleted);
+      workOrders = snapshot.workOrders
+        .filter((order) => !changed.has(order.work_order_id) && !deleted.has(order.work_order_id))
+        .concat(workOrders)
+        .sort((a, b) => a.work_order_id.localeCompare(b.work_order_id));
+    }
+
+    saveWorkOrderSnapshot({ watermark: delta.watermark, workOrders });
+    return workOrders;
   } catch (e: unknown) {
     console.log("postWorkOrderQuery call failed: ", getErrorMessage(e));
     throw e;
   }
 }
 
+export interface WorkOrderReport {
+  work_order_id: string;
+  safetycheckresponse?: string;
+  safetyCheckPerformedAt?: string;
+}
+
+// The list leaves out report bodies; fetch one when its details pane opens
+export async function fetchWorkOrderReport(workOrderId: string): Promise<WorkOrderReport> {
+  try {
+    const restInput = await getRestInput(config.WorkOrder_API_NAME);
+    const restOperation = post({
+      ...restInput,
+      path: `workorders`,
+      options: {
+        ...restInput.options,
+        body: { mode: "report", workOrderId }
+      }
+    });
+    const response = await restOperation.response;
+    return (await response.body.json()) as unknown as WorkOrderReport;
+  } catch (e: unknown) {
+    console.log("fetchWorkOrderReport call failed: ", getErrorMessage(e));
+    throw e;
+  }
+}
+
 export async function pollSafetyCheckStatus(requestId: string) {
   try {
       const restInput = await getRestInput(config.API_NAME);
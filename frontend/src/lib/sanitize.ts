@@ -0,0 +1,54 @@
+// Copyright 2024 Amazon.com, Inc. or its affiliates. All Rights Reserved.]
+// SPDX-License-Identifier: LicenseRef-.amazon.com.-AmznSL-1.0
+// Licensed under the Amazon Software License  http://aws.amazon.com/asl/
+
+// Markup the safety check agents write their reports in; anything else is dropped
+const ALLOWED_REPORT_TAGS = new Set([
+  "a", "b", "br", "caption", "code", "div", "em", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i",
+  "li", "ol", "p", "pre", "span", "strong", "table", "tbody", "td", "tfoot", "th", "thead", "tr",
+  "u", "ul",
+]);
+const ALLOWED_REPORT_ATTRIBUTES = new Set(["class", "colspan", "rowspan", "title", "href"]);
+// Elements removed together with their content
+const DROPPED_REPORT_TAGS = new Set(["script", "style", "iframe", "object", "embed", "template", "noscript"]);
+
+const sanitizeNode = (node: Node) => {
+  for (const child of Array.from(node.childNodes)) {
+    if (child.nodeType === Node.COMMENT_NODE) {
+      child.remove();
+      continue;
+    }
+    if (child.nodeType !== Node.ELEMENT_NODE) {
+      continue;
+    }
+    const element = child as Element;
+    const tag = element.tagName.toLowerCase();
+    if (DROPPED_REPORT_TAGS.has(tag)) {
+      element.remove();
+      continue;
+    }
+    sanitizeNode(element);
+    if (!ALLOWED_REPORT_TAGS.has(tag)) {
+      // Keep the text, lose the element
+      element.replaceWith(...Array.from(element.childNodes));
+      continue;
+    }
+    for (const attribute of Array.from(element.attributes)) {
+      const name = attribute.name.toLowerCase();
+      const allowed = ALLOWED_REPORT_ATTRIBUTES.has(name)
+        && (name !== "href" || /^(https?:|mailto:)/i.test(attribute.value.trim()));
+      if (!allowed) {
+        element.removeAttribute(attribute.name);
+      }
+    }
+  }
+};
+
+// Agent reports are HTML produced from model output; strip scripts, event handlers and unsafe
+// links before they are rendered with dangerouslySetInnerHTML
+export const sanitizeReportHtml = (html: string): string => {
+  // DOMParser documents are inert: nothing in them loads or runs while they are cleaned
+  const document = new DOMParser().parseFromString(html, "text/html");
+  sanitizeNode(document.body);
+  return document.body.innerHTML;
+};
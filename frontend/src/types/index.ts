@@ -4,6 +4,7 @@
 
 export type QueryObject = {
   query: string;
+  work_order_id: string;
   session_id: string;
 };
 